@@ -4,11 +4,26 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import functools
 import json
+import os
 import re
 from datetime import datetime, timezone
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    _parse_iso = datetime.fromisoformat
 
 ROOT = Path(__file__).resolve().parent
 CHARACTERS_DIR = ROOT / "characters"
@@ -26,91 +41,159 @@ KEY_STATS = [
     "misc.movement_speed_modifier_percent",
 ]
 
+SNAPSHOT_HISTORY_LIMIT = 120
+
+_KEY_PATHS = [key.split(".") for key in KEY_STATS]
+_MISSING = object()
+_DT_MIN_UTC = datetime.min.replace(tzinfo=timezone.utc)
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
 
+@functools.lru_cache(maxsize=256)
 def slugify(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+    return _SLUG_RE.sub("_", value.lower()).strip("_")
 
 
 def load_json(path: Path) -> dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     with path.open("r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
 def save_json(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
-        handle.write("\n")
+    if orjson is not None:
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    else:
+        data = (json.dumps(payload, indent=2) + "\n").encode("utf-8")
+    # Write the whole document to a sibling file and swap it in, so a crash
+    # mid-write never leaves a truncated ledger behind.
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def jsonl_line(payload: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload) + b"\n"
+    return (json.dumps(payload, ensure_ascii=True) + "\n").encode("ascii")
 
 
 def append_jsonl(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
+    line = jsonl_line(payload)
+    # One write per record on an O_APPEND descriptor keeps each line intact. Opening per record means
+    # a rotated or deleted journal is recreated rather than written to a stale inode.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+    try:
+        fd = os.open(path, flags, 0o644)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, flags, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
 
 
 def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_iso_cached(value: str) -> datetime | None:
+    try:
+        return _parse_iso(value)
+    except (ValueError, TypeError):
+        return None
+
+
 def parse_timestamp(value: Any) -> datetime | None:
     if not isinstance(value, str) or not value.strip():
         return None
-    try:
-        return datetime.fromisoformat(value)
-    except ValueError:
-        return None
+    return _parse_iso_cached(value)
 
 
-def parse_jsonl(path: Path) -> list[dict[str, Any]]:
+def parse_jsonl(path: Path) -> Iterator[dict[str, Any]]:
     if not path.exists():
-        return []
-    rows: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as handle:
+        return
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as handle:
         for line in handle:
-            raw = line.strip()
-            if not raw:
+            if line.isspace():
                 continue
-            item = json.loads(raw)
+            item = loads(line)
             if isinstance(item, dict):
-                rows.append(item)
-    return rows
+                yield item
 
 
-def format_value(value: float | int | None) -> str:
+def iter_jsonl_reverse(path: Path, window: int = 64 * 1024) -> Iterator[dict[str, Any]]:
+    if not path.exists():
+        return
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as handle:
+        end = handle.seek(0, os.SEEK_END)
+        carry = b""
+        while end > 0:
+            start = max(0, end - window)
+            handle.seek(start)
+            lines = (handle.read(end - start) + carry).split(b"\n")
+            # The first piece of a window may be a partial line; finish it with the next window.
+            carry = lines.pop(0) if start > 0 else b""
+            for line in reversed(lines):
+                if not line or line.isspace():
+                    continue
+                item = loads(line)
+                if isinstance(item, dict):
+                    yield item
+            end = start
+
+
+def parse_jsonl_last(path: Path) -> dict[str, Any] | None:
+    return next(iter_jsonl_reverse(path), None)
+
+
+def format_value(value: Any, missing: str = "unknown") -> str:
     if value is None:
-        return "unknown"
+        return missing
     if isinstance(value, int):
         return str(value)
-    if abs(value - round(value)) < 1e-9:
-        return str(int(round(value)))
-    return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, float):
+        # Round first so 1.9999999999 prints "2" and -1e-10 prints "0"; "+ 0.0" folds away -0.0.
+        value = round(value, 2) + 0.0
+        if value.is_integer():
+            return str(int(value))
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return str(value)
 
 
-def top_stat_changes(stat_changes: list[dict[str, Any]], limit: int = 5) -> list[dict[str, Any]]:
-    filtered: list[dict[str, Any]] = []
+def top_stat_changes(stat_changes: list[dict[str, Any]], limit: int | None = 5) -> list[dict[str, Any]]:
+    ranked: list[tuple[float, dict[str, Any]]] = []
     for change in stat_changes:
-        stat = str(change.get("stat", "")).strip()
         delta = change.get("delta")
-        if not stat or not isinstance(delta, (int, float)):
+        if not isinstance(delta, (int, float)) or not str(change.get("stat", "")).strip():
             continue
-        filtered.append(change)
-    filtered.sort(key=lambda item: abs(float(item["delta"])), reverse=True)
-    return filtered[:limit]
+        # Negated magnitude keeps the sort ascending, so ties stay in input order.
+        ranked.append((-abs(delta), change))
+    ranked.sort(key=itemgetter(0))
+    return [change for _, change in ranked[:limit]]
 
 
 def selected_stats(panel_stats: dict[str, Any]) -> dict[str, Any]:
-    flat: dict[str, Any] = {}
-
-    def walk(prefix: str, node: Any) -> None:
-        if isinstance(node, dict):
-            for key, value in node.items():
-                walk(f"{prefix}.{key}" if prefix else key, value)
-            return
-        flat[prefix] = node
-
-    walk("", panel_stats)
-    return {key: flat.get(key) for key in KEY_STATS if key in flat}
+    out: dict[str, Any] = {}
+    for key, path in zip(KEY_STATS, _KEY_PATHS):
+        node: Any = panel_stats
+        for part in path:
+            if not isinstance(node, dict):
+                break
+            node = node.get(part, _MISSING)
+            if node is _MISSING:
+                break
+        else:
+            if not isinstance(node, dict):
+                out[key] = node
+    return out
 
 
 def build_snapshot_observations(
@@ -134,11 +217,11 @@ def build_snapshot_observations(
 
     top_changes = top_stat_changes(stat_changes, limit=3)
     if top_changes:
-        parts = [
+        parts = "; ".join(
             f"{item['stat']} {format_value(item.get('before'))} -> {format_value(item.get('after'))}"
             for item in top_changes
-        ]
-        observations.append("Largest measured deltas: " + "; ".join(parts) + ".")
+        )
+        observations.append(f"Largest measured deltas: {parts}.")
 
     if inventory_counts:
         observations.append(
@@ -156,6 +239,8 @@ def build_market_observations(pricing_summary: dict[str, Any], posts: list[str])
     priced_items = pricing_summary.get("priced_items")
     total_items = pricing_summary.get("total_items")
     known_value = pricing_summary.get("known_value_chaos")
+    if isinstance(known_value, float) and known_value.is_integer():
+        known_value = int(known_value)
     if isinstance(priced_items, int) and isinstance(total_items, int):
         coverage = (priced_items / total_items * 100.0) if total_items else 0.0
         observations.append(
@@ -169,10 +254,9 @@ def build_market_observations(pricing_summary: dict[str, Any], posts: list[str])
             f"Top liquid or semi-liquid holding is {top.get('label', 'Unknown')} at about {format_value(top.get('chaos_value'))} chaos."
         )
 
-    if posts:
-        next_posts = [post for post in posts if post.startswith("[NEXT]")]
-        if next_posts:
-            observations.append(f"Latest action prompt: {next_posts[0]}")
+    next_post = next((post for post in posts if post.startswith("[NEXT]")), None)
+    if next_post is not None:
+        observations.append(f"Latest action prompt: {next_post}")
 
     return observations
 
@@ -184,6 +268,11 @@ def ensure_ledger(character_name: str) -> tuple[Path, Path, dict[str, Any]]:
     journal_path = char_dir / "journal.jsonl"
     if ledger_path.exists():
         ledger = load_json(ledger_path)
+        # Older ledgers embedded snapshot_history; fold it into the append-only file. The file may
+        # already exist (partial migration, restored ledger.json), so merge rather than skip.
+        legacy_history = ledger.pop("snapshot_history", None)
+        if isinstance(legacy_history, list) and legacy_history:
+            merge_snapshot_history(snapshot_history_path(char_dir), legacy_history)
     else:
         ledger = {
             "schema_version": 1,
@@ -205,7 +294,7 @@ def ensure_ledger(character_name: str) -> tuple[Path, Path, dict[str, Any]]:
 def merge_unique_strings(existing: list[Any], incoming: list[str], limit: int = 12) -> list[str]:
     seen: set[str] = set()
     merged: list[str] = []
-    for raw in list(incoming) + [str(item) for item in existing]:
+    for raw in chain(incoming, existing):
         item = str(raw).strip()
         if not item or item in seen:
             continue
@@ -216,22 +305,83 @@ def merge_unique_strings(existing: list[Any], incoming: list[str], limit: int =
     return merged
 
 
-def append_snapshot_history(ledger: dict[str, Any], entry: dict[str, Any], limit: int = 120) -> None:
-    history = ledger.setdefault("snapshot_history", [])
-    if not isinstance(history, list):
-        history = []
-        ledger["snapshot_history"] = history
+def timestamp_key(item: dict[str, Any], field: str) -> datetime:
+    return parse_timestamp(item.get(field)) or _DT_MIN_UTC
 
-    dedupe_key = str(entry.get("captured_at_utc", "")).strip()
-    if dedupe_key:
-        history = [item for item in history if not (isinstance(item, dict) and item.get("captured_at_utc") == dedupe_key)]
-    history.insert(0, entry)
-    history.sort(
-        key=lambda item: parse_timestamp(item.get("captured_at_utc")) or datetime.min.replace(tzinfo=timezone.utc),
-        reverse=True,
-    )
-    del history[limit:]
-    ledger["snapshot_history"] = history
+
+def insert_newest_first(items: list[dict[str, Any]], entry: dict[str, Any], field: str, limit: int) -> None:
+    keys = [timestamp_key(item, field) for item in items]
+    entry_key = timestamp_key(entry, field)
+    if any(newer < older for newer, older in zip(keys, keys[1:])):
+        # Hand-edited or legacy list that is not newest-first yet: fall back to a full sort.
+        items.insert(0, entry)
+        items.sort(key=lambda item: timestamp_key(item, field), reverse=True)
+    else:
+        # Keys are descending, so "key <= entry_key" flips False -> True exactly once.
+        index = bisect.bisect_left(keys, True, key=lambda key: key <= entry_key)
+        items.insert(index, entry)
+    del items[limit:]
+
+
+def snapshot_history_path(char_dir: Path) -> Path:
+    return char_dir / "snapshot_history.jsonl"
+
+
+def write_snapshot_history(history_path: Path, entries: list[dict[str, Any]]) -> None:
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = history_path.with_suffix(history_path.suffix + ".tmp")
+    tmp_path.write_bytes(b"".join(jsonl_line(entry) for entry in entries))
+    os.replace(tmp_path, history_path)
+
+
+def dedupe_snapshot_history(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Oldest-first in, oldest-first out; a later row with the same captured_at_utc (or an identical
+    # row without one) supersedes the earlier one.
+    kept: dict[Any, dict[str, Any]] = {}
+    for entry in entries:
+        dedupe_key = str(entry.get("captured_at_utc", "")).strip() or jsonl_line(entry)
+        kept.pop(dedupe_key, None)
+        kept[dedupe_key] = entry
+    return sorted(kept.values(), key=lambda item: timestamp_key(item, "captured_at_utc"))
+
+
+def merge_snapshot_history(history_path: Path, legacy_history: list[Any]) -> None:
+    legacy = [entry for entry in reversed(legacy_history) if isinstance(entry, dict)]
+    if not history_path.exists():
+        for entry in legacy:
+            append_jsonl(history_path, entry)
+        return
+    # Rows already in the file were written after the legacy list, so they win on conflicts.
+    write_snapshot_history(history_path, dedupe_snapshot_history(legacy + list(parse_jsonl(history_path))))
+
+
+def append_snapshot_history(
+    history_path: Path, entry: dict[str, Any], limit: int = SNAPSHOT_HISTORY_LIMIT
+) -> None:
+    append_jsonl(history_path, entry)
+    # Appends stay cheap; once the file holds twice the retention limit, compact it back to the
+    # newest `limit` captures, matching the cap the embedded list used to have.
+    with history_path.open("rb") as handle:
+        rows = sum(chunk.count(b"\n") for chunk in iter(lambda: handle.read(64 * 1024), b""))
+    if rows > 2 * limit:
+        write_snapshot_history(history_path, dedupe_snapshot_history(list(parse_jsonl(history_path)))[-limit:])
+
+
+def load_snapshot_history(char_dir: Path, limit: int = SNAPSHOT_HISTORY_LIMIT) -> list[dict[str, Any]]:
+    entries: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for entry in iter_jsonl_reverse(snapshot_history_path(char_dir)):
+        # A re-recorded capture supersedes the earlier row with the same timestamp.
+        dedupe_key = str(entry.get("captured_at_utc", "")).strip()
+        if dedupe_key:
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+        entries.append(entry)
+        if len(entries) >= limit:
+            break
+    entries.sort(key=lambda item: timestamp_key(item, "captured_at_utc"), reverse=True)
+    return entries
 
 
 def append_milestone(ledger: dict[str, Any], milestone: dict[str, Any]) -> None:
@@ -250,12 +400,7 @@ def append_milestone(ledger: dict[str, Any], milestone: dict[str, Any]) -> None:
         existing_key = (item.get("type"), item.get("timestamp_utc"), item.get("summary"))
         if existing_key == dedupe_key:
             return
-    milestones.insert(0, milestone)
-    milestones.sort(
-        key=lambda item: parse_timestamp(item.get("timestamp_utc")) or datetime.min.replace(tzinfo=timezone.utc),
-        reverse=True,
-    )
-    del milestones[12:]
+    insert_newest_first(milestones, milestone, "timestamp_utc", 12)
 
 
 def write_ledger(ledger_path: Path, ledger: dict[str, Any]) -> None:
@@ -359,8 +504,18 @@ def update_from_stat_watch(
     if not isinstance(equipped_changes, list):
         equipped_changes = []
 
+    rel_history = str(history_path.relative_to(ROOT))
+    artifacts: dict[str, str] | None = None
+    if archived_paths:
+        artifacts = {
+            "snapshot_path": str(archived_paths["snapshot"].relative_to(ROOT)),
+            "panel_stats_path": str(archived_paths["panel_stats"].relative_to(ROOT)),
+            "delta_path": str(archived_paths["delta"].relative_to(ROOT)),
+        }
+
+    ranked_changes = top_stat_changes(stat_changes, limit=None)
     stats_subset = selected_stats(panel_stats)
-    observations = build_snapshot_observations(stats_subset, stat_changes, equipped_changes, inventory_counts)
+    observations = build_snapshot_observations(stats_subset, ranked_changes, equipped_changes, inventory_counts)
 
     ledger["character"] = {
         "name": character_name,
@@ -371,40 +526,24 @@ def update_from_stat_watch(
         or snapshot_doc.get("items", {}).get("character", {}).get("league"),
     }
     update_active_context(ledger, "stat_watch", history_record.get("timestamp_utc"))
-    ledger["latest_snapshot"] = {
-        "captured_at_utc": history_record.get("timestamp_utc"),
-        "stats": stats_subset,
-        "inventory_counts": inventory_counts,
-        "equipped_changes": equipped_changes,
-        "top_stat_changes": top_stat_changes(stat_changes, limit=8),
-    }
-    if archived_paths:
-        ledger["latest_snapshot"]["artifacts"] = {
-            "snapshot_path": str(archived_paths["snapshot"].relative_to(ROOT)),
-            "panel_stats_path": str(archived_paths["panel_stats"].relative_to(ROOT)),
-            "delta_path": str(archived_paths["delta"].relative_to(ROOT)),
-        }
-
     snapshot_entry: dict[str, Any] = {
         "captured_at_utc": history_record.get("timestamp_utc"),
         "stats": stats_subset,
         "inventory_counts": inventory_counts,
         "equipped_changes": equipped_changes,
-        "top_stat_changes": top_stat_changes(stat_changes, limit=8),
+        "top_stat_changes": ranked_changes[:8],
     }
-    if archived_paths:
-        snapshot_entry["artifacts"] = {
-            "snapshot_path": str(archived_paths["snapshot"].relative_to(ROOT)),
-            "panel_stats_path": str(archived_paths["panel_stats"].relative_to(ROOT)),
-            "delta_path": str(archived_paths["delta"].relative_to(ROOT)),
-        }
-    append_snapshot_history(ledger, snapshot_entry)
+    if artifacts is not None:
+        snapshot_entry["artifacts"] = artifacts
+    # The latest snapshot and its history row are the same record; nothing mutates it afterwards.
+    ledger["latest_snapshot"] = snapshot_entry
+    append_snapshot_history(snapshot_history_path(ledger_path.parent), snapshot_entry)
 
     ledger["latest_observations"] = merge_unique_strings(ledger.get("latest_observations", []), observations)
     ledger["sources"]["stat_watch"] = {
         "snapshot_path": str(snapshot_path.relative_to(ROOT)),
         "panel_stats_path": str(stats_path.relative_to(ROOT)),
-        "history_path": str(history_path.relative_to(ROOT)),
+        "history_path": rel_history,
     }
     if archived_paths:
         ledger["sources"]["stat_watch"]["archive_dir"] = str(archived_paths["archive_dir"].relative_to(ROOT))
@@ -412,8 +551,7 @@ def update_from_stat_watch(
     summary_bits: list[str] = []
     if equipped_changes:
         summary_bits.append(f"{len(equipped_changes)} gear slot changes")
-    top_changes = top_stat_changes(stat_changes, limit=2)
-    for item in top_changes:
+    for item in ranked_changes[:2]:
         summary_bits.append(f"{item['stat']} to {format_value(item.get('after'))}")
     if not summary_bits:
         summary_bits.append("Snapshot recorded with no measured deltas")
@@ -422,7 +560,7 @@ def update_from_stat_watch(
         "timestamp_utc": history_record.get("timestamp_utc"),
         "type": "stat_watch",
         "summary": "; ".join(summary_bits),
-        "source": str(history_path.relative_to(ROOT)),
+        "source": rel_history,
     }
     append_milestone(ledger, milestone)
     write_ledger(ledger_path, ledger)
@@ -432,9 +570,9 @@ def update_from_stat_watch(
         "type": "stat_watch",
         "summary": milestone["summary"],
         "equipped_changes": equipped_changes,
-        "top_stat_changes": top_stat_changes(stat_changes, limit=8),
+        "top_stat_changes": ranked_changes[:8],
         "inventory_counts": inventory_counts,
-        "source": str(history_path.relative_to(ROOT)),
+        "source": rel_history,
     }
     append_jsonl(journal_path, journal_event)
 
@@ -520,15 +658,15 @@ def main() -> int:
         snapshot_path = ROOT / args.snapshot
         panel_stats_path = ROOT / args.panel_stats
         history_path = ROOT / args.history
-        history_rows = parse_jsonl(history_path)
-        if history_rows:
+        history_record = parse_jsonl_last(history_path)
+        if history_record is not None:
             update_from_stat_watch(
                 character_name=args.character,
                 account=args.account,
                 realm=args.realm,
                 snapshot_doc=load_json(snapshot_path),
                 panel_stats=load_json(panel_stats_path),
-                history_record=history_rows[-1],
+                history_record=history_record,
                 snapshot_path=snapshot_path,
                 stats_path=panel_stats_path,
                 history_path=history_path,
@@ -13,14 +13,31 @@ import argparse
 import json
 import os
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import http_keepalive
 from discord_persona_sender.discord_publish_log import DEFAULT_LOG_PATH, append_publish_history
 
 MAX_CONTENT_LEN = 1900
 
+# Only content and username vary between posts; the rest of the envelope is fixed.
+_PAYLOAD_TEMPLATE = b'{"content":%s,"username":%s,"allowed_mentions":{"parse":[]}}'
+
+
+def dumps_json(value: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode("utf-8")
+
+
+def build_payload(content: str, username: str) -> bytes:
+    return _PAYLOAD_TEMPLATE % (dumps_json(content), dumps_json(username))
+
 
 def build_persona_message(post_type: str, context: str, body: str) -> str:
     normalized_type = post_type.strip().upper()
@@ -54,37 +71,37 @@ def send_discord_message(
     metadata: dict[str, str] | None = None,
     log_path: str = DEFAULT_LOG_PATH,
 ) -> None:
-    payload = {
-        "content": content,
-        "username": username,
-        "allowed_mentions": {"parse": []},
-    }
-    req = urllib.request.Request(
+    # Webhook posts share keep-alive connections so bursts of persona posts only pay the
+    # TCP/TLS handshake once.
+    resp = http_keepalive.request(
+        "POST",
         with_wait_query(webhook_url),
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json", "User-Agent": "PoE-Assistant/1.0"},
-        method="POST",
+        build_payload(content, username),
+        {
+            "Content-Type": "application/json",
+            "User-Agent": "PoE-Assistant/1.0",
+            "Connection": "keep-alive",
+        },
+    )
+    if resp.status < 200 or resp.status >= 300:
+        detail = resp.body.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Discord webhook failed (HTTP {resp.status}): {detail}")
+    if not resp.body:
+        discord_message = None
+    elif orjson is not None:
+        discord_message = orjson.loads(resp.body)
+    else:
+        discord_message = json.loads(resp.body.decode("utf-8", errors="replace"))
+    append_publish_history(
+        source=source,
+        webhook_url=webhook_url,
+        username=username,
+        content=content,
+        embeds=[],
+        discord_message=discord_message if isinstance(discord_message, dict) else None,
+        metadata=metadata,
+        log_path=log_path,
     )
-
-    try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            if resp.status < 200 or resp.status >= 300:
-                raise RuntimeError(f"Discord webhook failed (HTTP {resp.status})")
-            raw = resp.read().decode("utf-8", errors="replace")
-            discord_message = json.loads(raw) if raw else None
-            append_publish_history(
-                source=source,
-                webhook_url=webhook_url,
-                username=username,
-                content=content,
-                embeds=[],
-                discord_message=discord_message if isinstance(discord_message, dict) else None,
-                metadata=metadata,
-                log_path=log_path,
-            )
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
-        raise RuntimeError(f"Discord webhook failed (HTTP {exc.code}): {detail}") from exc
 
 
 def parse_args() -> argparse.Namespace:
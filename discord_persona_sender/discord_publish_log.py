@@ -5,18 +5,40 @@ from __future__ import annotations
 
 import json
 import os
-import re
 from datetime import datetime, timezone
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DEFAULT_LOG_PATH = "logs/discord_publish_history.jsonl"
 
 
+def _append_line(log_path: str, line: bytes) -> None:
+    # Open per record so a rotated or deleted log is recreated instead of written to a stale inode;
+    # the directory is only created when the open says it is missing.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+    try:
+        fd = os.open(log_path, flags, 0o644)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        fd = os.open(log_path, flags, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
 def extract_webhook_id(webhook_url: str) -> str | None:
-    match = re.search(r"/api/webhooks/(\d+)/", webhook_url)
-    if not match:
+    _, marker, rest = webhook_url.partition("/api/webhooks/")
+    if not marker:
         return None
-    return match.group(1)
+    webhook_id, slash, _ = rest.partition("/")
+    if not slash or not webhook_id.isdecimal():
+        return None
+    return webhook_id
 
 
 def append_publish_history(
@@ -43,9 +65,8 @@ def append_publish_history(
         "metadata": metadata or {},
     }
 
-    log_dir = os.path.dirname(log_path)
-    if log_dir:
-        os.makedirs(log_dir, exist_ok=True)
-
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=True) + "\n")
+    if orjson is not None:
+        line = orjson.dumps(record) + b"\n"
+    else:
+        line = (json.dumps(record, ensure_ascii=True) + "\n").encode("ascii")
+    _append_line(log_path, line)
@@ -0,0 +1,144 @@
+"""Keep-alive HTTP connections shared by the Discord, OpenAI and PoE clients."""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import select
+import threading
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+
+MAX_IDLE_PER_HOST = 4
+# Only these are replayed after the server drops a reused connection mid-response; a replayed POST
+# could post a Discord card or bill an OpenAI call twice.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+# Idle connections per (scheme, host). A request checks one out for its duration, so concurrent
+# callers each get their own socket while later calls skip the TCP/TLS handshake.
+_IDLE_CONNECTIONS: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+
+@dataclass
+class HttpResult:
+    status: int
+    body: bytes
+    headers: dict[str, str]
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    # An idle socket only turns readable when the server has closed it (or sent junk we can't use).
+    if conn.sock is None:
+        return True
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _checkout(key: tuple[str, str]) -> http.client.HTTPConnection | None:
+    while True:
+        with _CONNECTIONS_LOCK:
+            idle = _IDLE_CONNECTIONS.get(key)
+            if not idle:
+                return None
+            conn = idle.pop()
+        if not _is_dropped(conn):
+            return conn
+        conn.close()
+
+
+def _checkin(key: tuple[str, str], conn: http.client.HTTPConnection) -> None:
+    with _CONNECTIONS_LOCK:
+        idle = _IDLE_CONNECTIONS.setdefault(key, [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def _proxy_for(parsed: urllib.parse.SplitResult) -> urllib.parse.SplitResult | None:
+    # Same HTTP(S)_PROXY / NO_PROXY lookup urllib.request.urlopen does.
+    proxy = urllib.request.getproxies().get(parsed.scheme)
+    if not proxy or urllib.request.proxy_bypass(parsed.hostname or ""):
+        return None
+    return urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+
+def _proxy_headers(proxy: urllib.parse.SplitResult) -> dict[str, str]:
+    if not proxy.username:
+        return {}
+    credentials = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+
+def _connect(parsed: urllib.parse.SplitResult, timeout: float) -> http.client.HTTPConnection:
+    https = parsed.scheme == "https"
+    proxy = _proxy_for(parsed)
+    if proxy is None:
+        conn_cls = http.client.HTTPSConnection if https else http.client.HTTPConnection
+        return conn_cls(parsed.netloc, timeout=timeout)
+    proxy_port = proxy.port or (443 if proxy.scheme == "https" else 80)
+    if https:
+        # CONNECT through the proxy, then TLS to the real host over the tunnel.
+        conn = http.client.HTTPSConnection(proxy.hostname or "", proxy_port, timeout=timeout)
+        conn.set_tunnel(parsed.hostname or "", parsed.port or 443, headers=_proxy_headers(proxy))
+        return conn
+    conn_cls = http.client.HTTPSConnection if proxy.scheme == "https" else http.client.HTTPConnection
+    return conn_cls(proxy.hostname or "", proxy_port, timeout=timeout)
+
+
+def _request_target(parsed: urllib.parse.SplitResult) -> tuple[str, dict[str, str]]:
+    """Returns the request target and any per-request proxy headers for the URL."""
+    path = parsed.path or "/"
+    proxy = _proxy_for(parsed) if parsed.scheme == "http" else None
+    if proxy is None:
+        return urllib.parse.urlunsplit(("", "", path, parsed.query, "")), {}
+    # Plain HTTP goes to the proxy with the absolute URL as the request target.
+    return urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, path, parsed.query, "")), _proxy_headers(proxy)
+
+
+def request(
+    method: str,
+    url: str,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = 20,
+) -> HttpResult:
+    parsed = urllib.parse.urlsplit(url)
+    key = (parsed.scheme, parsed.netloc)
+    target, proxy_headers = _request_target(parsed)
+    request_headers = {**(headers or {}), **proxy_headers}
+    retried = False
+    while True:
+        conn = None if retried else _checkout(key)
+        reused = conn is not None
+        if conn is None:
+            conn = _connect(parsed, timeout)
+        elif conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        sent = False
+        try:
+            conn.request(method, target, body=body, headers=request_headers)
+            sent = True
+            resp = conn.getresponse()
+            raw_body = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            # The server dropped an idle keep-alive connection. Retry once on a fresh one, but only if
+            # the request never went out or replaying it is harmless.
+            if reused and (not sent or method.upper() in IDEMPOTENT_METHODS):
+                retried = True
+                continue
+            raise
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            _checkin(key, conn)
+        return HttpResult(status=resp.status, body=raw_body, headers=dict(resp.getheaders()))
@@ -4,16 +4,26 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import html
 import json
 import os
 import re
+import string
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from character_ledger import format_value as format_ledger_value, load_snapshot_history, snapshot_history_path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 ROOT = Path(__file__).resolve().parent
 CHARACTERS_DIR = ROOT / "characters"
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
 
 SERIES = [
     ("Life", "defence.life", "#c2410c"),
@@ -25,6 +35,8 @@ SERIES = [
     ("Chaos Resist %", "defence.chaos_resist_percent", "#7c3aed"),
 ]
 
+MARKER_LIMIT = 200
+
 
 def env_first(*keys: str, default: str | None = None) -> str | None:
     for key in keys:
@@ -35,7 +47,7 @@ def env_first(*keys: str, default: str | None = None) -> str | None:
 
 
 def slugify(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+    return _SLUG_RE.sub("_", value.lower()).strip("_")
 
 
 def parse_args() -> argparse.Namespace:
@@ -46,20 +58,14 @@ def parse_args() -> argparse.Namespace:
 
 
 def load_json(path: Path) -> dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     with path.open("r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
 def format_value(value: Any) -> str:
-    if value is None:
-        return "n/a"
-    if isinstance(value, int):
-        return str(value)
-    if isinstance(value, float):
-        if abs(value - round(value)) < 1e-9:
-            return str(int(round(value)))
-        return f"{value:.2f}".rstrip("0").rstrip(".")
-    return str(value)
+    return format_ledger_value(value, missing="n/a")
 
 
 def format_timestamp(value: Any) -> str:
@@ -71,15 +77,53 @@ def format_timestamp(value: Any) -> str:
         return value
 
 
-def svg_line_chart(entries: list[dict[str, Any]], label: str, stat_key: str, color: str) -> str:
+# Every chart labels its markers with the same capture times; parse and escape each one once.
+@functools.lru_cache(maxsize=1024)
+def escaped_timestamp(value: str) -> str:
+    return html.escape(format_timestamp(value))
+
+
+def m4_downsample(
+    points: list[tuple[int, float, str]],
+    padding: int,
+    x_scale: float,
+) -> list[tuple[int, float, str]]:
+    # M4 aggregation: per pixel column keep the first, min, max and last point. The drawn
+    # polyline is pixel-identical to plotting every point, but its size is bounded by the width.
+    reduced: list[tuple[int, float, str]] = []
+    bucket: list[tuple[int, float, str]] = []
+    column = None
+    for point in points:
+        # Same expression and rounding as the rendered x coordinate.
+        point_column = round(padding + point[0] * x_scale)
+        if point_column != column and bucket:
+            reduced.extend(m4_bucket(bucket))
+            bucket = []
+        column = point_column
+        bucket.append(point)
+    if bucket:
+        reduced.extend(m4_bucket(bucket))
+    return reduced
+
+
+def m4_bucket(bucket: list[tuple[int, float, str]]) -> list[tuple[int, float, str]]:
+    low = min(bucket, key=lambda point: point[1])
+    high = max(bucket, key=lambda point: point[1])
+    return sorted({point[0]: point for point in (bucket[0], low, high, bucket[-1])}.values())
+
+
+def svg_line_chart(
+    timestamps: list[str],
+    stats_list: list[dict[str, Any]],
+    label: str,
+    stat_key: str,
+    color: str,
+) -> str:
     points: list[tuple[int, float, str]] = []
-    for idx, entry in enumerate(sorted(entries, key=lambda item: str(item.get("captured_at_utc", "")))):
-        stats = entry.get("stats", {})
-        if not isinstance(stats, dict):
-            continue
+    for idx, stats in enumerate(stats_list):
         value = stats.get(stat_key)
         if isinstance(value, (int, float)):
-            points.append((idx, float(value), str(entry.get("captured_at_utc", ""))))
+            points.append((idx, float(value), timestamps[idx]))
 
     if not points:
         return (
@@ -90,36 +134,53 @@ def svg_line_chart(entries: list[dict[str, Any]], label: str, stat_key: str, col
     width = 720
     height = 220
     padding = 28
-    min_value = min(value for _, value, _ in points)
-    max_value = max(value for _, value, _ in points)
+    min_value = max_value = points[0][1]
+    for _, value, _ in points:
+        if value < min_value:
+            min_value = value
+        elif value > max_value:
+            max_value = value
     spread = max(max_value - min_value, 1.0)
     x_span = max(len(points) - 1, 1)
-
-    coords: list[str] = []
-    markers: list[str] = []
-    for idx, value, timestamp in points:
-        x = padding + ((width - padding * 2) * idx / x_span)
-        y = height - padding - ((height - padding * 2) * (value - min_value) / spread)
-        coords.append(f"{x:.1f},{y:.1f}")
-        markers.append(
-            "<circle "
-            f"cx='{x:.1f}' cy='{y:.1f}' r='3.5' fill='{color}'>"
-            f"<title>{html.escape(format_timestamp(timestamp))}: {html.escape(format_value(value))}</title>"
-            "</circle>"
-        )
-
     baseline_y = height - padding
-    return (
-        f"<section class='chart-card'><h3>{html.escape(label)}</h3>"
-        f"<svg viewBox='0 0 {width} {height}' role='img' aria-label='{html.escape(label)} chart'>"
-        f"<line x1='{padding}' y1='{baseline_y}' x2='{width - padding}' y2='{baseline_y}' class='axis' />"
-        f"<line x1='{padding}' y1='{padding}' x2='{padding}' y2='{baseline_y}' class='axis' />"
-        f"<polyline fill='none' stroke='{color}' stroke-width='3' points='{' '.join(coords)}' />"
-        f"{''.join(markers)}"
-        f"<text x='{padding}' y='20' class='axis-label'>min {html.escape(format_value(min_value))}</text>"
-        f"<text x='{width - 130}' y='20' class='axis-label'>max {html.escape(format_value(max_value))}</text>"
-        "</svg></section>"
-    )
+    escaped_label = html.escape(label)
+
+    # Hoist the affine transform out of the loop: one multiply-add per axis per point.
+    x_scale = (width - padding * 2) / x_span
+    y_scale = (height - padding * 2) / spread
+    if len(points) > width - padding * 2:
+        points = m4_downsample(points, padding, x_scale)
+    # Values here are floats, so format_value output is HTML-safe without escaping.
+    plotted: list[tuple[str, str, float, str]] = []
+    for idx, value, timestamp in points:
+        x = padding + idx * x_scale
+        y = baseline_y - (value - min_value) * y_scale
+        plotted.append((f"{x:.0f}", f"{y:.0f}", value, timestamp))
+
+    out: list[str] = []
+    w = out.append
+    w(f"<section class='chart-card'><h3>{escaped_label}</h3>")
+    w(f"<svg viewBox='0 0 {width} {height}' role='img' aria-label='{escaped_label} chart'>")
+    w(f"<line x1='{padding}' y1='{baseline_y}' x2='{width - padding}' y2='{baseline_y}' class='axis'/>")
+    w(f"<line x1='{padding}' y1='{padding}' x2='{padding}' y2='{baseline_y}' class='axis'/>")
+    w(f"<polyline fill='none' stroke='{color}' stroke-width='3' points='")
+    separator = ""
+    for x, y, _, _ in plotted:
+        w(f"{separator}{x},{y}")
+        separator = " "
+    w("'/>")
+    # Past a few hundred points the markers overlap into a solid band; the line alone reads the same.
+    if len(plotted) <= MARKER_LIMIT:
+        for x, y, value, timestamp in plotted:
+            w(
+                f"<circle cx='{x}' cy='{y}' r='3.5' fill='{color}'>"
+                f"<title>{escaped_timestamp(timestamp)}: {format_value(value)}</title>"
+                "</circle>"
+            )
+    w(f"<text x='{padding}' y='20' class='axis-label'>min {format_value(min_value)}</text>")
+    w(f"<text x='{width - 130}' y='20' class='axis-label'>max {format_value(max_value)}</text>")
+    w("</svg></section>")
+    return "".join(out)
 
 
 def table_rows(entries: list[dict[str, Any]]) -> str:
@@ -141,169 +202,165 @@ def table_rows(entries: list[dict[str, Any]]) -> str:
     return "".join(rows)
 
 
-def build_html(ledger: dict[str, Any], character_name: str) -> str:
-    entries = ledger.get("snapshot_history", [])
-    if not isinstance(entries, list):
-        entries = []
-    entries = [entry for entry in entries if isinstance(entry, dict)]
-
-    latest_snapshot = ledger.get("latest_snapshot", {})
-    observations = ledger.get("latest_observations", [])
-    if not isinstance(observations, list):
-        observations = []
+def collapse_css(css: str) -> str:
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", css).strip()
 
-    charts = "".join(svg_line_chart(entries, label, stat_key, color) for label, stat_key, color in SERIES)
-    observation_items = "".join(f"<li>{html.escape(str(item))}</li>" for item in observations[:8])
-    latest_captured = format_timestamp(latest_snapshot.get("captured_at_utc"))
-    latest_stats = latest_snapshot.get("stats", {}) if isinstance(latest_snapshot.get("stats"), dict) else {}
 
-    return f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>{html.escape(character_name)} Snapshot Report</title>
-  <style>
-    :root {{
+# Kept readable here and collapsed once at import; the report embeds the compact form.
+REPORT_CSS = collapse_css(
+    """
+    :root {
       --bg: #f4efe7;
       --panel: #fffaf3;
       --ink: #1c1917;
       --muted: #57534e;
       --line: #d6d3d1;
       --accent: #9a3412;
-    }}
-    body {{
+    }
+    body {
       margin: 0;
       font-family: Georgia, "Times New Roman", serif;
       background:
         radial-gradient(circle at top left, rgba(154, 52, 18, 0.14), transparent 28%),
         linear-gradient(180deg, #f8f3ea 0%, var(--bg) 100%);
       color: var(--ink);
-    }}
-    main {{
+    }
+    main {
       max-width: 1180px;
       margin: 0 auto;
       padding: 32px 20px 56px;
-    }}
-    h1, h2, h3 {{
+    }
+    h1, h2, h3 {
       font-weight: 600;
       margin: 0 0 12px;
-    }}
-    p {{
+    }
+    p {
       margin: 0;
       color: var(--muted);
-    }}
-    .hero {{
+    }
+    .hero {
       background: linear-gradient(135deg, rgba(154, 52, 18, 0.95), rgba(41, 37, 36, 0.92));
       color: #fff7ed;
       border-radius: 20px;
       padding: 24px;
       box-shadow: 0 18px 50px rgba(28, 25, 23, 0.16);
-    }}
-    .hero p {{
+    }
+    .hero p {
       color: rgba(255, 247, 237, 0.86);
-    }}
-    .stats {{
+    }
+    .stats {
       display: grid;
       grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
       gap: 14px;
       margin-top: 22px;
-    }}
-    .stat-card, .chart-card, .table-card, .notes-card {{
+    }
+    .stat-card, .chart-card, .table-card, .notes-card {
       background: var(--panel);
       border: 1px solid rgba(87, 83, 78, 0.16);
       border-radius: 18px;
       padding: 18px;
       box-shadow: 0 12px 28px rgba(28, 25, 23, 0.06);
-    }}
-    .stat-value {{
+    }
+    .stat-value {
       display: block;
       font-size: 1.8rem;
       color: var(--accent);
       margin-top: 8px;
-    }}
-    .grid {{
+    }
+    .grid {
       display: grid;
       grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
       gap: 18px;
       margin-top: 22px;
-    }}
-    .chart-card svg {{
+    }
+    .chart-card svg {
       width: 100%;
       height: auto;
       display: block;
       margin-top: 12px;
       overflow: visible;
-    }}
-    .axis {{
+    }
+    .axis {
       stroke: var(--line);
       stroke-width: 1;
-    }}
-    .axis-label {{
+    }
+    .axis-label {
       fill: var(--muted);
       font-size: 12px;
-    }}
-    ul {{
+    }
+    ul {
       margin: 0;
       padding-left: 20px;
       color: var(--muted);
-    }}
-    table {{
+    }
+    table {
       width: 100%;
       border-collapse: collapse;
       margin-top: 12px;
       font-size: 0.95rem;
-    }}
-    th, td {{
+    }
+    th, td {
       text-align: left;
       padding: 10px 8px;
       border-bottom: 1px solid var(--line);
       vertical-align: top;
-    }}
-    th {{
+    }
+    th {
       color: var(--muted);
       font-weight: 600;
-    }}
-    .empty {{
+    }
+    .empty {
       color: var(--muted);
       font-style: italic;
-    }}
-  </style>
+    }
+"""
+)
+
+# Text slots are escaped by build_html before substitution; markup slots are prebuilt HTML.
+REPORT_TEMPLATE = string.Template(
+    """<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>$character Snapshot Report</title>
+  <style>$css</style>
 </head>
 <body>
   <main>
     <section class="hero">
-      <h1>{html.escape(character_name)} Snapshot Report</h1>
+      <h1>$character Snapshot Report</h1>
       <p>Ledger-backed validation view for captured stat-watch runs.</p>
     </section>
 
     <section class="stats">
       <article class="stat-card">
         <h2>Snapshots</h2>
-        <span class="stat-value">{len(entries)}</span>
+        <span class="stat-value">$snapshot_count</span>
       </article>
       <article class="stat-card">
         <h2>Last Capture</h2>
-        <span class="stat-value">{html.escape(latest_captured)}</span>
+        <span class="stat-value">$latest_captured</span>
       </article>
       <article class="stat-card">
         <h2>Latest Life</h2>
-        <span class="stat-value">{html.escape(format_value(latest_stats.get("defence.life")))}</span>
+        <span class="stat-value">$latest_life</span>
       </article>
       <article class="stat-card">
         <h2>Latest DPS</h2>
-        <span class="stat-value">{html.escape(format_value(latest_stats.get("offence.total_dps")))}</span>
+        <span class="stat-value">$latest_dps</span>
       </article>
     </section>
 
     <section class="grid">
-      {charts}
+      $charts
     </section>
 
     <section class="grid">
       <article class="notes-card">
         <h2>Latest Observations</h2>
-        <ul>{observation_items or "<li>No observations yet.</li>"}</ul>
+        <ul>$observation_items</ul>
       </article>
       <article class="table-card">
         <h2>Snapshot Index</h2>
@@ -318,7 +375,7 @@ def build_html(ledger: dict[str, Any], character_name: str) -> str:
               <th>Archived Snapshot</th>
             </tr>
           </thead>
-          <tbody>{table_rows(entries)}</tbody>
+          <tbody>$table_rows</tbody>
         </table>
       </article>
     </section>
@@ -326,6 +383,49 @@ def build_html(ledger: dict[str, Any], character_name: str) -> str:
 </body>
 </html>
 """
+)
+
+
+def build_html(ledger: dict[str, Any], character_name: str) -> str:
+    entries = ledger.get("snapshot_history", [])
+    if not isinstance(entries, list):
+        entries = []
+    entries = [entry for entry in entries if isinstance(entry, dict)]
+
+    latest_snapshot = ledger.get("latest_snapshot", {})
+    observations = ledger.get("latest_observations", [])
+    if not isinstance(observations, list):
+        observations = []
+
+    # Every series plots the same chronological order; sort and unpack the entries once.
+    entries_sorted = sorted(entries, key=lambda entry: str(entry.get("captured_at_utc", "")))
+    timestamps = [str(entry.get("captured_at_utc", "")) for entry in entries_sorted]
+    stats_list = [entry["stats"] if isinstance(entry.get("stats"), dict) else {} for entry in entries_sorted]
+    chart_parts: list[str] = []
+    for label, stat_key, color in SERIES:
+        chart_parts.append(svg_line_chart(timestamps, stats_list, label, stat_key, color))
+    charts = "".join(chart_parts)
+    observation_parts: list[str] = []
+    for item in observations[:8]:
+        observation_parts.append(f"<li>{html.escape(str(item))}</li>")
+    observation_items = "".join(observation_parts)
+    latest_captured = format_timestamp(latest_snapshot.get("captured_at_utc"))
+    latest_stats = latest_snapshot.get("stats", {}) if isinstance(latest_snapshot.get("stats"), dict) else {}
+
+    text_slots = {
+        "character": character_name,
+        "latest_captured": latest_captured,
+        "latest_life": format_value(latest_stats.get("defence.life")),
+        "latest_dps": format_value(latest_stats.get("offence.total_dps")),
+    }
+    return REPORT_TEMPLATE.substitute(
+        {key: html.escape(value) for key, value in text_slots.items()},
+        css=REPORT_CSS,
+        snapshot_count=len(entries),
+        charts=charts,
+        observation_items=observation_items or "<li>No observations yet.</li>",
+        table_rows=table_rows(entries),
+    )
 
 
 def main() -> int:
@@ -340,9 +440,16 @@ def main() -> int:
 
     output_path = Path(args.output) if args.output else ROOT / "reports" / f"{char_slug}_snapshot_report.html"
     ledger = load_json(ledger_path)
+    # ledger.json only carries the bounded latest_* state; history rows are read
+    # from the tail of snapshot_history.jsonl, stopping at the ledger's limit.
+    if snapshot_history_path(ledger_path.parent).exists():
+        ledger["snapshot_history"] = load_snapshot_history(ledger_path.parent)
     html_doc = build_html(ledger, args.character)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(html_doc, encoding="utf-8")
+    # Swap in a fully written file so a viewer never loads a half-written report.
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    tmp_path.write_bytes(html_doc.encode("utf-8"))
+    os.replace(tmp_path, output_path)
     print(f"Saved report: {output_path}")
     return 0
 
@@ -1,5 +1,7 @@
 import asyncio
 import os
+import queue
+import threading
 
 from dotenv import load_dotenv
 from google import genai
@@ -19,8 +21,11 @@ CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
+MAX_CHUNKS_PER_SEND = 8
+MIC_MIME_TYPE = f"audio/pcm;rate={SEND_SAMPLE_RATE}"
 
 pya = pyaudio.PyAudio()
+MIC_DEVICE_INDEX = pya.get_default_input_device_info()["index"]
 
 
 # --- Live API config ---
@@ -32,38 +37,129 @@ CONFIG = {
 
 client = genai.Client(api_key=api_key)
 
-audio_queue_output: asyncio.Queue[bytes] = asyncio.Queue()
-audio_queue_mic: asyncio.Queue[dict] = asyncio.Queue(maxsize=20)
+# PortAudio reads and writes block, so each stream gets one long-lived thread
+# instead of an executor hop per chunk. The speaker queue is fed from the loop
+# and drained by the writer thread; None tells the writer to stop.
+audio_queue_output: queue.Queue[bytes | None] = queue.Queue()
+audio_queue_mic: asyncio.Queue[bytes] = asyncio.Queue(maxsize=20)
 audio_stream = None
 playback_stream = None
+audio_threads: list[threading.Thread] = []
+stop_audio = threading.Event()
+# run() gathers this with the session tasks so a device error on an audio thread ends the session.
+audio_failed: asyncio.Future | None = None
+
+
+def start_audio_thread(target, *args) -> None:
+    if stop_audio.is_set():
+        # Threads from a previous start/stop cycle have already been joined.
+        stop_audio.clear()
+        audio_threads.clear()
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    audio_threads.append(thread)
+
+
+def stop_audio_threads() -> bool:
+    """Stops the audio threads; returns False if one is still blocked in PortAudio."""
+    stop_audio.set()
+    clear_output_queue()
+    audio_queue_output.put_nowait(None)
+    # Reads and writes are one chunk long, so both threads see stop_audio within a chunk.
+    for thread in audio_threads:
+        thread.join(timeout=1)
+    if any(thread.is_alive() for thread in audio_threads):
+        return False
+    audio_threads.clear()
+    return True
+
+
+def close_audio() -> None:
+    """Stops the audio threads, then closes the streams once nothing is using them."""
+    if not stop_audio_threads():
+        # Closing a stream under a blocked read is undefined; leave it to process exit.
+        print("Audio thread did not stop; skipping stream cleanup.")
+        return
+    for stream in (audio_stream, playback_stream):
+        if stream:
+            stream.stop_stream()
+            stream.close()
+    pya.terminate()
+
+
+def report_audio_error(exc: BaseException) -> None:
+    if audio_failed is not None and not audio_failed.done():
+        audio_failed.set_exception(exc)
+
+
+def clear_output_queue() -> None:
+    while True:
+        try:
+            audio_queue_output.get_nowait()
+        except queue.Empty:
+            return
+
+
+def queue_mic_chunk(data: bytes) -> None:
+    """Queues a mic chunk on the loop thread, dropping the oldest one if sending lags."""
+    if audio_queue_mic.full():
+        audio_queue_mic.get_nowait()
+    audio_queue_mic.put_nowait(data)
+
+
+def read_mic(loop: asyncio.AbstractEventLoop) -> None:
+    """Reads the mic on a dedicated thread and hands each chunk to the event loop."""
+    kwargs = {"exception_on_overflow": False} if __debug__ else {}
+    while not stop_audio.is_set():
+        try:
+            data = audio_stream.read(CHUNK_SIZE, **kwargs)
+        except OSError as exc:
+            if not stop_audio.is_set():
+                loop.call_soon_threadsafe(report_audio_error, exc)
+            return
+        loop.call_soon_threadsafe(queue_mic_chunk, data)
+
+
+def write_playback(loop: asyncio.AbstractEventLoop) -> None:
+    """Writes queued speaker audio to PortAudio on a dedicated thread."""
+    while True:
+        bytestream = audio_queue_output.get()
+        if bytestream is None:
+            return
+        try:
+            playback_stream.write(bytestream)
+        except OSError as exc:
+            if not stop_audio.is_set():
+                loop.call_soon_threadsafe(report_audio_error, exc)
+            return
 
 
 async def listen_audio() -> None:
     """Listens for audio and puts it into the mic audio queue."""
     global audio_stream
-    mic_info = pya.get_default_input_device_info()
     audio_stream = await asyncio.to_thread(
         pya.open,
         format=FORMAT,
         channels=CHANNELS,
         rate=SEND_SAMPLE_RATE,
         input=True,
-        input_device_index=mic_info["index"],
+        input_device_index=MIC_DEVICE_INDEX,
         frames_per_buffer=CHUNK_SIZE,
     )
-    kwargs = {"exception_on_overflow": False} if __debug__ else {}
-    while True:
-        data = await asyncio.to_thread(audio_stream.read, CHUNK_SIZE, **kwargs)
-        await audio_queue_mic.put(
-            {"data": data, "mime_type": f"audio/pcm;rate={SEND_SAMPLE_RATE}"}
-        )
+    start_audio_thread(read_mic, asyncio.get_running_loop())
 
 
 async def send_realtime(session) -> None:
     """Sends audio from the mic audio queue to the GenAI session."""
     while True:
-        msg = await audio_queue_mic.get()
-        await session.send_realtime_input(audio=msg)
+        data = await audio_queue_mic.get()
+        # When chunks have backed up, send them as one message; raw PCM concatenates cleanly.
+        if not audio_queue_mic.empty():
+            parts = [data]
+            while len(parts) < MAX_CHUNKS_PER_SEND and not audio_queue_mic.empty():
+                parts.append(audio_queue_mic.get_nowait())
+            data = b"".join(parts)
+        await session.send_realtime_input(audio={"data": data, "mime_type": MIC_MIME_TYPE})
 
 
 async def receive_audio(session) -> None:
@@ -77,8 +173,7 @@ async def receive_audio(session) -> None:
 
         # Only flush buffered playback if the server explicitly interrupted this turn.
         if server_content and getattr(server_content, "interrupted", False):
-            while not audio_queue_output.empty():
-                audio_queue_output.get_nowait()
+            clear_output_queue()
 
 
 async def play_audio() -> None:
@@ -91,13 +186,13 @@ async def play_audio() -> None:
         rate=RECEIVE_SAMPLE_RATE,
         output=True,
     )
-    while True:
-        bytestream = await audio_queue_output.get()
-        await asyncio.to_thread(playback_stream.write, bytestream)
+    start_audio_thread(write_playback, asyncio.get_running_loop())
 
 
 async def run() -> None:
     """Main function to run the audio loop."""
+    global audio_failed
+    audio_failed = asyncio.get_running_loop().create_future()
     tasks = []
     try:
         async with client.aio.live.connect(model=MODEL, config=CONFIG) as live_session:
@@ -108,7 +203,7 @@ async def run() -> None:
                 asyncio.create_task(receive_audio(live_session)),
                 asyncio.create_task(play_audio()),
             ]
-            await asyncio.gather(*tasks)
+            await asyncio.gather(*tasks, audio_failed)
     except asyncio.CancelledError:
         pass
     finally:
@@ -116,13 +211,8 @@ async def run() -> None:
             if not task.done():
                 task.cancel()
 
-        if audio_stream:
-            audio_stream.stop_stream()
-            audio_stream.close()
-        if playback_stream:
-            playback_stream.stop_stream()
-            playback_stream.close()
-        pya.terminate()
+        # Joining the threads and PortAudio's stop_stream() both block; keep them off the event loop.
+        await asyncio.to_thread(close_audio)
         print("\nConnection closed.")
 
 
@@ -1,7 +1,10 @@
 import asyncio
 import datetime as dt
+import functools
+import heapq
 import json
 import os
+from itertools import islice
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -40,17 +43,32 @@ def tool_get_time(_: dict) -> dict:
     return {"ok": True, "time": now.strftime("%Y-%m-%d %H:%M:%S %Z")}
 
 
+# Keyed on the directory's mtime, which changes whenever an entry is added, removed, or renamed.
+@functools.lru_cache(maxsize=64)
+def list_dir_head(path: str, mtime_ns: int) -> tuple[str, ...]:
+    # Only the first 100 names are returned, so keep a bounded heap instead of sorting everything.
+    with os.scandir(path) as it:
+        return tuple(heapq.nsmallest(100, (entry.name for entry in it)))
+
+
 def tool_list_files(args: dict) -> dict:
     rel = str(args.get("path", "."))
     target = (WORKSPACE / rel).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_dir():
         return {"ok": False, "error": f"directory not found: {target}"}
-    entries = sorted(p.name for p in target.iterdir())[:100]
+    entries = list(list_dir_head(str(target), target.stat().st_mtime_ns))
     return {"ok": True, "path": str(target), "entries": entries}
 
 
+# Size joins mtime in the key so a rewrite within the same timestamp tick still misses.
+@functools.lru_cache(maxsize=128)
+def read_head(path: str, mtime_ns: int, size: int, lines: int) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return "".join(islice(f, lines))
+
+
 def tool_read_file_head(args: dict) -> dict:
     rel = args.get("path")
     if not rel:
@@ -60,13 +78,13 @@ def tool_read_file_head(args: dict) -> dict:
     lines = max(1, min(lines, 200))
 
     target = (WORKSPACE / str(rel)).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_file():
         return {"ok": False, "error": f"file not found: {target}"}
 
-    with target.open("r", encoding="utf-8", errors="replace") as f:
-        content = "".join(f.readlines()[:lines])
+    stat = target.stat()
+    content = read_head(str(target), stat.st_mtime_ns, stat.st_size, lines)
     return {"ok": True, "path": str(target), "content": content}
 
 
@@ -1,7 +1,12 @@
 import asyncio
 import datetime as dt
+import functools
+import heapq
 import json
 import os
+import queue
+import threading
+from itertools import islice
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -24,6 +29,7 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-native-audio-preview-
 BRAIN_MODEL = os.getenv("BRAIN_MODEL", "gpt-5.2")
 WAKE_PHRASE = os.getenv("WAKE_PHRASE", "computer")
 WORKSPACE = Path(os.getenv("WORKSPACE_ROOT", "/home/ath/Desktop/live_api")).resolve()
+LOG_TOOL_JSON = os.getenv("LOG_TOOL_JSON", "0") == "1"
 
 
 # --- Audio config ---
@@ -34,9 +40,12 @@ RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 
 pya = pyaudio.PyAudio()
+MIC_DEVICE_INDEX = pya.get_default_input_device_info()["index"]
 audio_stream = None
 playback_stream = None
-audio_queue_output: asyncio.Queue[bytes] = asyncio.Queue(maxsize=256)
+playback_thread: threading.Thread | None = None
+# Drained by the playback thread; None tells it to stop.
+audio_queue_output: queue.Queue[bytes | None] = queue.Queue(maxsize=256)
 tool_response_lock = asyncio.Lock()
 
 
@@ -58,17 +67,32 @@ def tool_get_time(_: dict) -> dict:
     return {"ok": True, "time": now.strftime("%Y-%m-%d %H:%M:%S %Z")}
 
 
+# Keyed on the directory's mtime, which changes whenever an entry is added, removed, or renamed.
+@functools.lru_cache(maxsize=64)
+def list_dir_head(path: str, mtime_ns: int) -> tuple[str, ...]:
+    # Only the first 100 names are returned, so keep a bounded heap instead of sorting everything.
+    with os.scandir(path) as it:
+        return tuple(heapq.nsmallest(100, (entry.name for entry in it)))
+
+
 def tool_list_files(args: dict) -> dict:
     rel = str(args.get("path", "."))
     target = (WORKSPACE / rel).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_dir():
         return {"ok": False, "error": f"directory not found: {target}"}
-    entries = sorted(p.name for p in target.iterdir())[:100]
+    entries = list(list_dir_head(str(target), target.stat().st_mtime_ns))
     return {"ok": True, "path": str(target), "entries": entries}
 
 
+# Size joins mtime in the key so a rewrite within the same timestamp tick still misses.
+@functools.lru_cache(maxsize=128)
+def read_head(path: str, mtime_ns: int, size: int, lines: int) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return "".join(islice(f, lines))
+
+
 def tool_read_file_head(args: dict) -> dict:
     rel = args.get("path")
     if not rel:
@@ -78,13 +102,13 @@ def tool_read_file_head(args: dict) -> dict:
     lines = max(1, min(lines, 200))
 
     target = (WORKSPACE / str(rel)).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_file():
         return {"ok": False, "error": f"file not found: {target}"}
 
-    with target.open("r", encoding="utf-8", errors="replace") as f:
-        content = "".join(f.readlines()[:lines])
+    stat = target.stat()
+    content = read_head(str(target), stat.st_mtime_ns, stat.st_size, lines)
     return {"ok": True, "path": str(target), "content": content}
 
 
@@ -120,6 +144,14 @@ def tool_ask_brain(args: dict) -> dict:
     }
 
 
+def warm_brain_connection() -> None:
+    # Any cheap authenticated request opens the pooled TLS connection ask_brain will reuse.
+    try:
+        openai_client.models.retrieve(BRAIN_MODEL)
+    except Exception as exc:  # noqa: BLE001
+        log(f"[brain] warm-up failed: {exc}")
+
+
 TOOL_HANDLERS = {
     "get_time": tool_get_time,
     "list_files": tool_list_files,
@@ -189,14 +221,13 @@ def run_tool(name: str, args: dict) -> dict:
 
 async def send_audio(session) -> None:
     global audio_stream
-    mic_info = pya.get_default_input_device_info()
     audio_stream = await asyncio.to_thread(
         pya.open,
         format=FORMAT,
         channels=CHANNELS,
         rate=SEND_SAMPLE_RATE,
         input=True,
-        input_device_index=mic_info["index"],
+        input_device_index=MIC_DEVICE_INDEX,
         frames_per_buffer=CHUNK_SIZE,
     )
 
@@ -212,8 +243,33 @@ async def send_audio(session) -> None:
             log("[mic] streaming...")
 
 
+def write_playback() -> None:
+    while True:
+        bytestream = audio_queue_output.get()
+        if bytestream is None:
+            return
+        try:
+            playback_stream.write(bytestream)
+        except Exception as exc:  # noqa: BLE001
+            log(f"[audio_error] playback write failed: {exc}")
+
+
+def stop_playback() -> None:
+    global playback_thread
+    while True:
+        try:
+            audio_queue_output.get_nowait()
+        except queue.Empty:
+            break
+    audio_queue_output.put_nowait(None)
+    # Wait for the in-flight write to finish before the caller closes the stream.
+    if playback_thread:
+        playback_thread.join()
+        playback_thread = None
+
+
 async def play_audio() -> None:
-    global playback_stream
+    global playback_stream, playback_thread
     playback_stream = await asyncio.to_thread(
         pya.open,
         format=FORMAT,
@@ -221,40 +277,49 @@ async def play_audio() -> None:
         rate=RECEIVE_SAMPLE_RATE,
         output=True,
     )
-    while True:
-        bytestream = await audio_queue_output.get()
-        try:
-            # Use one direct write path to reduce thread churn around PortAudio.
-            playback_stream.write(bytestream)
-        except Exception as exc:  # noqa: BLE001
-            log(f"[audio_error] playback write failed: {exc}")
+    # PortAudio writes block until the device takes the audio; keep them on one
+    # long-lived thread so they neither stall the event loop nor hop executors per chunk.
+    playback_thread = threading.Thread(target=write_playback, daemon=True)
+    playback_thread.start()
 
 
-async def handle_tool_calls(session, tool_call) -> None:
-    function_responses = []
-    for fc in tool_call.function_calls:
-        args = fc.args if isinstance(fc.args, dict) else {}
+async def run_tool_call(fc) -> types.FunctionResponse:
+    args = fc.args if isinstance(fc.args, dict) else {}
+    if LOG_TOOL_JSON:
         log(f"[tool_call] {fc.name} args={json.dumps(args, ensure_ascii=True)}")
+    else:
+        log(f"[tool_call] {fc.name}")
 
-        # Run heavy brain call with timeout so loop can't hang forever.
-        if fc.name == "ask_brain":
-            try:
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(run_tool, fc.name, args),
-                    timeout=20,
-                )
-            except asyncio.TimeoutError:
-                result = {"ok": False, "error": "ask_brain timed out"}
-        else:
-            result = run_tool(fc.name, args)
-
+    # Run heavy brain call with timeout so loop can't hang forever.
+    if fc.name == "ask_brain":
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(run_tool, fc.name, args),
+                timeout=20,
+            )
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": "ask_brain timed out"}
+    else:
+        result = await asyncio.to_thread(run_tool, fc.name, args)
+
+    if LOG_TOOL_JSON:
         log(f"[tool_result] {json.dumps(result, ensure_ascii=True)[:1000]}")
-        function_responses.append(
-            types.FunctionResponse(id=fc.id, name=fc.name, response=result)
-        )
+    elif result.get("ok"):
+        log(f"[tool_result] {fc.name} ok")
+    else:
+        log(f"[tool_result] {fc.name} error={result.get('error')}")
+    return types.FunctionResponse(id=fc.id, name=fc.name, response=result)
+
+
+async def handle_tool_calls(session, tool_call) -> None:
+    # Sibling calls in one turn are independent; run them together and only lock the send.
+    # run_tool turns tool exceptions into error results, so gather never sees one.
+    function_responses = await asyncio.gather(
+        *(run_tool_call(fc) for fc in tool_call.function_calls)
+    )
 
     async with tool_response_lock:
-        await session.send_tool_response(function_responses=function_responses)
+        await session.send_tool_response(function_responses=list(function_responses))
 
 
 async def receive_loop(session) -> None:
@@ -268,7 +333,7 @@ async def receive_loop(session) -> None:
                     if audio_queue_output.full():
                         try:
                             audio_queue_output.get_nowait()
-                        except asyncio.QueueEmpty:
+                        except queue.Empty:
                             pass
                     audio_queue_output.put_nowait(inline_data.data)
 
@@ -309,11 +374,12 @@ async def run() -> None:
         ),
     }
 
-    tasks = []
+    # Warm the brain connection while the Gemini session is being set up.
+    tasks = [asyncio.create_task(asyncio.to_thread(warm_brain_connection))]
     try:
         async with gemini_client.aio.live.connect(model=GEMINI_MODEL, config=config) as session:
             log(f"Connected. Wake phrase: '{WAKE_PHRASE}'. Brain model: {BRAIN_MODEL}.")
-            tasks = [
+            tasks += [
                 asyncio.create_task(send_audio(session)),
                 asyncio.create_task(receive_loop(session)),
                 asyncio.create_task(play_audio()),
@@ -324,6 +390,7 @@ async def run() -> None:
             if not t.done():
                 t.cancel()
 
+        stop_playback()
         if audio_stream:
             audio_stream.stop_stream()
             audio_stream.close()
@@ -1,13 +1,18 @@
 import asyncio
 import datetime as dt
+import functools
+import heapq
 import json
 import os
+from collections import OrderedDict, deque
+from itertools import islice
 from pathlib import Path
 
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 import pyaudio
 from websockets.exceptions import ConnectionClosed
 
@@ -25,6 +30,7 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-native-audio-preview-
 BRAIN_MODEL = os.getenv("BRAIN_MODEL", "gpt-5.2")
 WAKE_PHRASE = os.getenv("WAKE_PHRASE", "computer")
 WORKSPACE = Path(os.getenv("WORKSPACE_ROOT", "/home/ath/Desktop/live_api")).resolve()
+LOG_TOOL_JSON = os.getenv("LOG_TOOL_JSON", "0") == "1"
 PLAY_MAIN_AUDIO = False
 
 
@@ -34,20 +40,35 @@ CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
+MAX_PLAYBACK_WRITE = 64 * 1024
+MAX_PROCESSED_CALL_IDS = 1024
+MAX_BUFFERED_AUDIO_CHUNKS = 256
 
 pya = pyaudio.PyAudio()
 audio_stream = None
 playback_stream = None
-audio_queue_output: asyncio.Queue[bytes] = asyncio.Queue(maxsize=256)
+# One playback consumer: a deque plus one wake-up future is all it needs. Producers wait on
+# audio_space when the buffer is full, so a stalled output device can't grow it without bound.
+audio_buffer: deque[bytes] = deque()
+audio_waiter: asyncio.Future | None = None
+audio_space = asyncio.Event()
+audio_space.set()
 tool_response_lock = asyncio.Lock()
 reader_lock = asyncio.Lock()
 reader_active = asyncio.Event()
-processed_function_call_ids: set[str] = set()
+# Recent tool call ids only; duplicates arrive close together, so old ids can be dropped.
+processed_function_call_ids: OrderedDict[str, None] = OrderedDict()
 current_reader_task: asyncio.Task | None = None
 
 
 gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Keep brain connections alive between ask_brain turns instead of re-handshaking TLS each time.
+# The brain call is awaited on the event loop, so no worker thread is tied up per request.
+openai_http = DefaultAsyncHttpxClient(
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+    timeout=httpx.Timeout(20.0, connect=5.0),
+)
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=openai_http)
 
 
 def ts() -> str:
@@ -64,17 +85,32 @@ def tool_get_time(_: dict) -> dict:
     return {"ok": True, "time": now.strftime("%Y-%m-%d %H:%M:%S %Z")}
 
 
+# Keyed on the directory's mtime, which changes whenever an entry is added, removed, or renamed.
+@functools.lru_cache(maxsize=64)
+def list_dir_head(path: str, mtime_ns: int) -> tuple[str, ...]:
+    # Only the first 100 names are returned, so keep a bounded heap instead of sorting everything.
+    with os.scandir(path) as it:
+        return tuple(heapq.nsmallest(100, (entry.name for entry in it)))
+
+
 def tool_list_files(args: dict) -> dict:
     rel = str(args.get("path", "."))
     target = (WORKSPACE / rel).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_dir():
         return {"ok": False, "error": f"directory not found: {target}"}
-    entries = sorted(p.name for p in target.iterdir())[:100]
+    entries = list(list_dir_head(str(target), target.stat().st_mtime_ns))
     return {"ok": True, "path": str(target), "entries": entries}
 
 
+# Size joins mtime in the key so a rewrite within the same timestamp tick still misses.
+@functools.lru_cache(maxsize=128)
+def read_head(path: str, mtime_ns: int, size: int, lines: int) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return "".join(islice(f, lines))
+
+
 def tool_read_file_head(args: dict) -> dict:
     rel = args.get("path")
     if not rel:
@@ -84,13 +120,13 @@ def tool_read_file_head(args: dict) -> dict:
     lines = max(1, min(lines, 200))
 
     target = (WORKSPACE / str(rel)).resolve()
-    if WORKSPACE not in target.parents and target != WORKSPACE:
+    if not target.is_relative_to(WORKSPACE):
         return {"ok": False, "error": "path outside workspace"}
     if not target.exists() or not target.is_file():
         return {"ok": False, "error": f"file not found: {target}"}
 
-    with target.open("r", encoding="utf-8", errors="replace") as f:
-        content = "".join(f.readlines()[:lines])
+    stat = target.stat()
+    content = read_head(str(target), stat.st_mtime_ns, stat.st_size, lines)
     return {"ok": True, "path": str(target), "content": content}
 
 
@@ -98,7 +134,7 @@ def tool_echo(args: dict) -> dict:
     return {"ok": True, "text": str(args.get("text", ""))}
 
 
-def tool_ask_brain(args: dict) -> dict:
+async def tool_ask_brain(args: dict) -> dict:
     query = str(args.get("query", "")).strip()
     if not query:
         return {"ok": False, "error": "missing query"}
@@ -109,7 +145,7 @@ def tool_ask_brain(args: dict) -> dict:
         "Keep it under 80 words unless explicitly asked for detail."
     )
 
-    resp = openai_client.responses.create(
+    resp = await openai_client.responses.create(
         model=BRAIN_MODEL,
         input=[
             {"role": "system", "content": prompt},
@@ -125,11 +161,22 @@ def tool_ask_brain(args: dict) -> dict:
     }
 
 
+async def warm_brain_connection() -> None:
+    # Any cheap authenticated request opens the pooled TLS connection ask_brain will reuse.
+    try:
+        await openai_client.models.retrieve(BRAIN_MODEL)
+    except Exception as exc:  # noqa: BLE001
+        log(f"[brain] warm-up failed: {exc}")
+
+
 TOOL_HANDLERS = {
     "get_time": tool_get_time,
     "list_files": tool_list_files,
     "read_file_head": tool_read_file_head,
     "echo": tool_echo,
+}
+
+ASYNC_TOOL_HANDLERS = {
     "ask_brain": tool_ask_brain,
 }
 
@@ -192,12 +239,58 @@ def run_tool(name: str, args: dict) -> dict:
         return {"ok": False, "error": f"tool exception: {exc}"}
 
 
+async def run_async_tool(name: str, args: dict) -> dict:
+    try:
+        return await ASYNC_TOOL_HANDLERS[name](args)
+    except Exception as exc:  # noqa: BLE001
+        return {"ok": False, "error": f"tool exception: {exc}"}
+
+
+async def queue_audio(data: bytes) -> None:
+    global audio_waiter
+    while len(audio_buffer) >= MAX_BUFFERED_AUDIO_CHUNKS:
+        audio_space.clear()
+        await audio_space.wait()
+    audio_buffer.append(data)
+    waiter, audio_waiter = audio_waiter, None
+    if waiter and not waiter.done():
+        waiter.set_result(None)
+
+
+async def next_audio() -> bytes:
+    global audio_waiter
+    # Loop because a handoff may clear the buffer between the wake-up and the pop.
+    while not audio_buffer:
+        audio_waiter = asyncio.get_running_loop().create_future()
+        await audio_waiter
+    chunk = audio_buffer.popleft()
+    audio_space.set()
+    return chunk
+
+
 def clear_output_queue() -> None:
-    while not audio_queue_output.empty():
-        try:
-            audio_queue_output.get_nowait()
-        except asyncio.QueueEmpty:
-            break
+    audio_buffer.clear()
+    audio_space.set()
+
+
+def close_stream(stream) -> None:
+    try:
+        stream.stop_stream()
+        stream.close()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+READER_CONFIG = types.LiveConnectConfig(
+    response_modalities=["AUDIO"],
+    output_audio_transcription=types.AudioTranscriptionConfig(),
+    temperature=0,
+    system_instruction=(
+        "You are ReaderAgent. Read the provided script verbatim. "
+        "Do not add, remove, summarize, or modify words. "
+        "Output only spoken audio."
+    ),
+)
 
 
 async def speak_with_fresh_reader(script: str) -> None:
@@ -206,18 +299,7 @@ async def speak_with_fresh_reader(script: str) -> None:
         reader_active.set()
         try:
             log("[reader] start fresh reader session")
-            config = {
-                "response_modalities": ["AUDIO"],
-                "output_audio_transcription": {},
-                "temperature": 0,
-                "system_instruction": (
-                    "You are ReaderAgent. Read the provided script verbatim. "
-                    "Do not add, remove, summarize, or modify words. "
-                    "Output only spoken audio."
-                ),
-            }
-
-            async with gemini_client.aio.live.connect(model=GEMINI_MODEL, config=config) as reader:
+            async with gemini_client.aio.live.connect(model=GEMINI_MODEL, config=READER_CONFIG) as reader:
                 await reader.send_client_content(
                     turns={
                         "role": "user",
@@ -226,23 +308,24 @@ async def speak_with_fresh_reader(script: str) -> None:
                     turn_complete=True,
                 )
 
+                # Audio parts stream in many times a second; read each field once per message.
                 async for response in reader.receive():
-                    server_content = getattr(response, "server_content", None)
-                    if not server_content:
+                    server_content = response.server_content
+                    if server_content is None:
                         continue
 
-                    if server_content.model_turn:
-                        for part in server_content.model_turn.parts:
-                            inline_data = getattr(part, "inline_data", None)
-                            if inline_data and isinstance(inline_data.data, bytes):
-                                await audio_queue_output.put(inline_data.data)
+                    model_turn = server_content.model_turn
+                    if model_turn:
+                        for part in model_turn.parts:
+                            inline_data = part.inline_data
+                            if inline_data is not None and isinstance(inline_data.data, bytes):
+                                await queue_audio(inline_data.data)
 
-                    if getattr(server_content, "output_transcription", None):
-                        t = server_content.output_transcription.text
-                        if t:
-                            log(f"[reader_spoken] {t}")
+                    output_transcription = server_content.output_transcription
+                    if output_transcription and output_transcription.text:
+                        log(f"[reader_spoken] {output_transcription.text}")
 
-                    if getattr(server_content, "turn_complete", False):
+                    if server_content.turn_complete:
                         log("[reader] done")
                         break
         finally:
@@ -285,6 +368,23 @@ async def start_reader_handoff(session, script: str) -> None:
 
 async def send_audio(session) -> None:
     global audio_stream
+    loop = asyncio.get_running_loop()
+    mic_chunks: asyncio.Queue[bytes] = asyncio.Queue(maxsize=20)
+
+    def queue_mic_chunk(data: bytes) -> None:
+        # Drop the oldest chunk rather than stall PortAudio if uploading falls behind.
+        if mic_chunks.full():
+            mic_chunks.get_nowait()
+        mic_chunks.put_nowait(data)
+
+    def on_mic_audio(in_data, frame_count, time_info, status):
+        # Runs on PortAudio's thread; hand the buffer to the loop without an executor hop. Nothing is
+        # uploaded while the reader speaks, so skip the hop entirely rather than stopping the stream,
+        # which would block the event loop while PortAudio drains.
+        if not reader_active.is_set():
+            loop.call_soon_threadsafe(queue_mic_chunk, in_data)
+        return None, pyaudio.paContinue
+
     mic_info = pya.get_default_input_device_info()
     audio_stream = await asyncio.to_thread(
         pya.open,
@@ -294,13 +394,13 @@ async def send_audio(session) -> None:
         input=True,
         input_device_index=mic_info["index"],
         frames_per_buffer=CHUNK_SIZE,
+        stream_callback=on_mic_audio,
     )
 
-    kwargs = {"exception_on_overflow": False}
     chunks_sent = 0
     while True:
-        data = await asyncio.to_thread(audio_stream.read, CHUNK_SIZE, **kwargs)
-        # Keep draining mic, but do not upload while ReaderAgent is speaking.
+        data = await mic_chunks.get()
+        # Drop chunks queued just before ReaderAgent started speaking.
         if reader_active.is_set():
             continue
         await session.send_realtime_input(
@@ -322,7 +422,16 @@ async def play_audio() -> None:
         frames_per_buffer=CHUNK_SIZE,
     )
     while True:
-        bytestream = await audio_queue_output.get()
+        bytestream = await next_audio()
+        # Hand everything already buffered to PortAudio in one write, capped to keep jitter low.
+        if audio_buffer:
+            parts = [bytestream]
+            size = len(bytestream)
+            while audio_buffer and size + len(audio_buffer[0]) <= MAX_PLAYBACK_WRITE:
+                chunk = audio_buffer.popleft()
+                parts.append(chunk)
+                size += len(chunk)
+            bytestream = b"".join(parts)
         try:
             await asyncio.to_thread(playback_stream.write, bytestream)
         except Exception as exc:  # noqa: BLE001
@@ -336,23 +445,30 @@ async def handle_tool_calls(session, tool_call) -> None:
         if fc.id and fc.id in processed_function_call_ids:
             continue
         if fc.id:
-            processed_function_call_ids.add(fc.id)
+            processed_function_call_ids[fc.id] = None
+            if len(processed_function_call_ids) > MAX_PROCESSED_CALL_IDS:
+                processed_function_call_ids.popitem(last=False)
 
         args = fc.args if isinstance(fc.args, dict) else {}
-        log(f"[tool_call] {fc.name} args={json.dumps(args, ensure_ascii=True)}")
+        if LOG_TOOL_JSON:
+            log(f"[tool_call] {fc.name} args={json.dumps(args, ensure_ascii=True)}")
+        else:
+            log(f"[tool_call] {fc.name}")
 
-        if fc.name == "ask_brain":
+        if fc.name in ASYNC_TOOL_HANDLERS:
             try:
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(run_tool, fc.name, args),
-                    timeout=20,
-                )
+                result = await asyncio.wait_for(run_async_tool(fc.name, args), timeout=20)
             except asyncio.TimeoutError:
-                result = {"ok": False, "error": "ask_brain timed out"}
+                result = {"ok": False, "error": f"{fc.name} timed out"}
         else:
             result = run_tool(fc.name, args)
 
-        log(f"[tool_result] {json.dumps(result, ensure_ascii=True)[:1000]}")
+        if LOG_TOOL_JSON:
+            log(f"[tool_result] {json.dumps(result, ensure_ascii=True)[:1000]}")
+        elif result.get("ok"):
+            log(f"[tool_result] {fc.name} ok")
+        else:
+            log(f"[tool_result] {fc.name} error={result.get('error')}")
 
         if fc.name == "ask_brain" and result.get("ok") and result.get("script"):
             # ReaderAgent is the only narrator for complex answers.
@@ -396,69 +512,70 @@ async def receive_loop(session) -> None:
     turn_text_parts: list[str] = []
 
     async for response in session.receive():
-        server_content = getattr(response, "server_content", None)
-
-        if server_content and server_content.model_turn:
+        server_content = response.server_content
+        if server_content is not None:
             # Avoid duplicate playback with ReaderAgent; keep main-agent audio muted by default.
-            if PLAY_MAIN_AUDIO:
+            if PLAY_MAIN_AUDIO and server_content.model_turn:
                 for part in server_content.model_turn.parts:
-                    inline_data = getattr(part, "inline_data", None)
-                    if inline_data and isinstance(inline_data.data, bytes):
-                        await audio_queue_output.put(inline_data.data)
-
-        if server_content and getattr(server_content, "input_transcription", None):
-            text = server_content.input_transcription.text
-            if text:
-                log(f"[heard] {text}")
-
-        # Suppress main-agent spoken logs in handoff mode; ReaderAgent is authoritative voice.
-        if server_content and getattr(server_content, "output_transcription", None):
-            t = server_content.output_transcription.text
-            if t:
-                turn_text_parts.append(t)
-                log(f"[model_text] {t}")
-
-        if server_content and getattr(server_content, "turn_complete", False):
-            log("[turn] complete")
-            if (not turn_saw_tool_call) and turn_text_parts:
-                text = "".join(turn_text_parts).strip()
-                if text:
-                    log("[handoff] reading direct model output via ReaderAgent")
-                    await start_reader_handoff(session, text)
-            turn_saw_tool_call = False
-            turn_text_parts = []
-
-        if getattr(response, "tool_call", None):
+                    inline_data = part.inline_data
+                    if inline_data is not None and isinstance(inline_data.data, bytes):
+                        await queue_audio(inline_data.data)
+
+            input_transcription = server_content.input_transcription
+            if input_transcription and input_transcription.text:
+                log(f"[heard] {input_transcription.text}")
+
+            # Suppress main-agent spoken logs in handoff mode; ReaderAgent is authoritative voice.
+            output_transcription = server_content.output_transcription
+            if output_transcription and output_transcription.text:
+                turn_text_parts.append(output_transcription.text)
+                log(f"[model_text] {output_transcription.text}")
+
+            if server_content.turn_complete:
+                log("[turn] complete")
+                if (not turn_saw_tool_call) and turn_text_parts:
+                    text = "".join(turn_text_parts).strip()
+                    if text:
+                        log("[handoff] reading direct model output via ReaderAgent")
+                        await start_reader_handoff(session, text)
+                turn_saw_tool_call = False
+                turn_text_parts = []
+
+        if response.tool_call:
             turn_saw_tool_call = True
             asyncio.create_task(handle_tool_calls(session, response.tool_call))
 
 
+# Built once so reconnects do not re-validate the tool declarations and instructions.
+LIVE_CONFIG = types.LiveConnectConfig(
+    response_modalities=["AUDIO"],
+    input_audio_transcription=types.AudioTranscriptionConfig(),
+    output_audio_transcription=types.AudioTranscriptionConfig(),
+    tools=[types.Tool(function_declarations=FUNCTION_DECLARATIONS)],
+    temperature=0,
+    system_instruction=(
+        f"You are MainVoiceAgent. Wake phrase is '{WAKE_PHRASE}'. "
+        "If wake phrase is absent, do not respond. "
+        "After wake phrase is present, you must call exactly one tool before any spoken response. "
+        "For current time/date questions, call get_time immediately. "
+        "For complex/general knowledge, call ask_brain. "
+        "After ask_brain returns with do_not_speak_further=true, do not provide any further spoken content. "
+        "ReaderAgent is the only narrator for that answer. "
+        "For local file/time requests, use local tools and answer briefly."
+    ),
+)
+
+
 async def run() -> None:
     global audio_stream, playback_stream
-    config = {
-        "response_modalities": ["AUDIO"],
-        "input_audio_transcription": {},
-        "output_audio_transcription": {},
-        "tools": [{"function_declarations": FUNCTION_DECLARATIONS}],
-        "temperature": 0,
-        "system_instruction": (
-            f"You are MainVoiceAgent. Wake phrase is '{WAKE_PHRASE}'. "
-            "If wake phrase is absent, do not respond. "
-            "After wake phrase is present, you must call exactly one tool before any spoken response. "
-            "For current time/date questions, call get_time immediately. "
-            "For complex/general knowledge, call ask_brain. "
-            "After ask_brain returns with do_not_speak_further=true, do not provide any further spoken content. "
-            "ReaderAgent is the only narrator for that answer. "
-            "For local file/time requests, use local tools and answer briefly."
-        ),
-    }
-
     reconnect_delay_s = 1.0
+    # Warm the brain connection while the first Gemini session is being set up.
+    warm_task = asyncio.create_task(warm_brain_connection())
     try:
         while True:
             tasks = []
             try:
-                async with gemini_client.aio.live.connect(model=GEMINI_MODEL, config=config) as session:
+                async with gemini_client.aio.live.connect(model=GEMINI_MODEL, config=LIVE_CONFIG) as session:
                     log(
                         f"Connected. Wake phrase: '{WAKE_PHRASE}'. Brain model: {BRAIN_MODEL}. Mode: handoff"
                     )
@@ -485,22 +602,17 @@ async def run() -> None:
                     if not t.done():
                         t.cancel()
 
+                # stop_stream() blocks while PortAudio drains; keep it off the event loop.
                 if audio_stream:
-                    try:
-                        audio_stream.stop_stream()
-                        audio_stream.close()
-                    except Exception:  # noqa: BLE001
-                        pass
+                    await asyncio.to_thread(close_stream, audio_stream)
                     audio_stream = None
                 if playback_stream:
-                    try:
-                        playback_stream.stop_stream()
-                        playback_stream.close()
-                    except Exception:  # noqa: BLE001
-                        pass
+                    await asyncio.to_thread(close_stream, playback_stream)
                     playback_stream = None
                 log("Disconnected.")
     finally:
+        warm_task.cancel()
+        await openai_client.close()
         pya.terminate()
 
 
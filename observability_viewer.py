@@ -2,15 +2,52 @@
 from __future__ import annotations
 
 import argparse
+import gzip
 import json
+import mmap
+import threading
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Both parsers accept bytes and raise ValueError subclasses on bad input.
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(payload: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload).encode("utf-8")
+
+
 ROOT = Path(__file__).resolve().parent
 RUNS_DIR = ROOT / "logs" / "build_intel_runs"
 EVENTS_PATH = ROOT / "logs" / "dspy_observability.jsonl"
 
+# Run summaries keyed by file name, tagged with the mtime they were parsed at.
+_RUN_CACHE: dict[str, tuple[int, dict]] = {}
+# Encoded /api/runs body, tagged with the (name, mtime) listing it was built from.
+_RUNS_LOCK = threading.Lock()
+_RUNS_BYTES: tuple[tuple[tuple[str, int], ...], bytes] | None = None
+
+# EVENTS_PATH is append-only, so it is indexed incrementally: each request only parses lines
+# appended since the last one. The index resets if the file is replaced or truncated.
+# All request threads share one read-only mapping of the file, remapped only when it grows.
+_EVENTS_LOCK = threading.Lock()
+_EVENTS_MAP: mmap.mmap | None = None
+_EVENTS_INODE: int | None = None
+_EVENTS_POS = 0
+_EVENT_OFFSETS: dict[str, list[int]] = {}
+# response_id -> (run_id if found, byte offset the search has covered so far)
+_RESPONSE_RUN_IDS: dict[str, tuple[str | None, int]] = {}
+# run_id -> (indexed event count, encoded /api/events body)
+_EVENTS_BYTES: dict[str, tuple[int, bytes]] = {}
+
 HTML = """<!doctype html>
 <html lang=\"en\">
 <head>
@@ -125,66 +162,167 @@ loadRuns();
 </html>
 """
 
+# The page never changes at runtime; encode and compress it once.
+HTML_BYTES = HTML.encode("utf-8")
+HTML_GZIP = gzip.compress(HTML_BYTES, 6)
+
 
 def _load_json(path: Path) -> dict:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return _loads(path.read_bytes())
     except Exception:
         return {}
 
 
-def _list_runs() -> list[dict]:
-    rows: list[dict] = []
+def _run_files() -> list[tuple[Path, int]]:
+    files: list[tuple[Path, int]] = []
     if not RUNS_DIR.exists():
-        return rows
+        return files
     for path in sorted(RUNS_DIR.glob("*.json"), reverse=True):
-        doc = _load_json(path)
-        summary = doc.get("summary", {}) if isinstance(doc, dict) else {}
-        character = summary.get("character", {}) if isinstance(summary, dict) else {}
-        token_budget = doc.get("token_budget", {}) if isinstance(doc, dict) else {}
-        rows.append(
-            {
-                "file": path.name,
-                "generated_at_utc": doc.get("generated_at_utc"),
-                "model": doc.get("model"),
-                "status": "posted" if doc.get("posted") else "dry-run",
-                "character": character.get("name"),
-                "realm": character.get("realm"),
-                "actual_total_tokens": token_budget.get("actual_total_tokens"),
-            }
-        )
+        try:
+            files.append((path, path.stat().st_mtime_ns))
+        except OSError:
+            continue
+    return files
+
+
+def _list_runs(files: list[tuple[Path, int]]) -> list[dict]:
+    rows: list[dict] = []
+    seen: set[str] = set()
+    for path, mtime_ns in files:
+        seen.add(path.name)
+        cached = _RUN_CACHE.get(path.name)
+        if cached and cached[0] == mtime_ns:
+            rows.append(cached[1])
+            continue
+        row = _run_row(path)
+        _RUN_CACHE[path.name] = (mtime_ns, row)
+        rows.append(row)
+    for name in list(_RUN_CACHE):
+        if name not in seen:
+            _RUN_CACHE.pop(name, None)
     return rows
 
 
-def _events_for_run(run_id: str) -> list[dict]:
-    events: list[dict] = []
+def _runs_bytes() -> bytes:
+    # Dashboard polling mostly sees an unchanged directory; reuse the encoded body then.
+    global _RUNS_BYTES
+    files = _run_files()
+    key = tuple((path.name, mtime_ns) for path, mtime_ns in files)
+    with _RUNS_LOCK:
+        if _RUNS_BYTES is None or _RUNS_BYTES[0] != key:
+            _RUNS_BYTES = (key, _dumps({"runs": _list_runs(files)}))
+        return _RUNS_BYTES[1]
+
+
+def _run_row(path: Path) -> dict:
+    doc = _load_json(path)
+    summary = doc.get("summary", {}) if isinstance(doc, dict) else {}
+    character = summary.get("character", {}) if isinstance(summary, dict) else {}
+    token_budget = doc.get("token_budget", {}) if isinstance(doc, dict) else {}
+    return {
+        "file": path.name,
+        "generated_at_utc": doc.get("generated_at_utc"),
+        "model": doc.get("model"),
+        "status": "posted" if doc.get("posted") else "dry-run",
+        "character": character.get("name"),
+        "realm": character.get("realm"),
+        "actual_total_tokens": token_budget.get("actual_total_tokens"),
+    }
+
+
+def _events_map(size: int) -> mmap.mmap | None:
+    global _EVENTS_MAP
+    if _EVENTS_MAP is not None and len(_EVENTS_MAP) == size:
+        return _EVENTS_MAP
+    if _EVENTS_MAP is not None:
+        _EVENTS_MAP.close()
+        _EVENTS_MAP = None
+    if size:
+        with EVENTS_PATH.open("rb") as handle:
+            _EVENTS_MAP = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return _EVENTS_MAP
+
+
+def _line_at(mm: mmap.mmap, start: int, end: int) -> bytes:
+    line_end = mm.find(b"\n", start, end)
+    return mm[start : end if line_end == -1 else line_end]
+
+
+def _refresh_event_index() -> mmap.mmap | None:
+    global _EVENTS_INODE, _EVENTS_POS
+    stat = EVENTS_PATH.stat()
+    if stat.st_ino != _EVENTS_INODE or stat.st_size < _EVENTS_POS:
+        if _EVENTS_MAP is not None:
+            _events_map(0)
+        _EVENT_OFFSETS.clear()
+        _RESPONSE_RUN_IDS.clear()
+        _EVENTS_BYTES.clear()
+        _EVENTS_INODE = stat.st_ino
+        _EVENTS_POS = 0
+    mm = _events_map(stat.st_size)
+    if mm is None:
+        return None
+    size = len(mm)
+    pos = _EVENTS_POS
+    while pos < size:
+        line = _line_at(mm, pos, size)
+        row = None
+        if line.strip():
+            try:
+                row = _loads(line)
+            except ValueError:
+                if pos + len(line) == size:
+                    # The last line may still be mid-write; pick it up on the next refresh.
+                    break
+        if isinstance(row, dict) and isinstance(row.get("run_id"), str):
+            _EVENT_OFFSETS.setdefault(row["run_id"], []).append(pos)
+        pos = min(pos + len(line) + 1, size)
+    _EVENTS_POS = pos
+    return mm
+
+
+def _events_bytes(run_id: str) -> bytes:
     if not run_id or not EVENTS_PATH.exists():
-        return events
-    for line in EVENTS_PATH.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        try:
-            row = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if row.get("run_id") == run_id:
-            events.append(row)
-    return events
+        return _dumps({"events": []})
+    with _EVENTS_LOCK:
+        mm = _refresh_event_index()
+        offsets = _EVENT_OFFSETS.get(run_id, [])
+        # The log is append-only, so a run's body only changes when it gains events.
+        cached = _EVENTS_BYTES.get(run_id)
+        if cached is not None and cached[0] == len(offsets):
+            return cached[1]
+        events = [_loads(_line_at(mm, offset, _EVENTS_POS)) for offset in offsets]
+        raw = _dumps({"events": events})
+        if offsets:
+            _EVENTS_BYTES[run_id] = (len(offsets), raw)
+    return raw
 
 
 class Handler(BaseHTTPRequestHandler):
+    # Every response sets Content-Length, so browsers can keep one connection (and one
+    # server thread) across dashboard refreshes instead of reconnecting per request.
+    protocol_version = "HTTP/1.1"
+
     def _json(self, payload: dict, status: int = 200) -> None:
-        raw = json.dumps(payload).encode("utf-8")
+        self._json_bytes(_dumps(payload), status)
+
+    def _json_bytes(self, raw: bytes, status: int = 200) -> None:
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(raw)))
         self.end_headers()
         self.wfile.write(raw)
 
-    def _html(self, text: str) -> None:
-        raw = text.encode("utf-8")
+    def _html(self) -> None:
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        raw = HTML_GZIP if use_gzip else HTML_BYTES
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "public, max-age=300")
         self.send_header("Content-Length", str(len(raw)))
         self.end_headers()
         self.wfile.write(raw)
@@ -197,11 +335,11 @@ class Handler(BaseHTTPRequestHandler):
         query = parse_qs(parsed.query)
 
         if parsed.path == "/":
-            self._html(HTML)
+            self._html()
             return
 
         if parsed.path == "/api/runs":
-            self._json({"runs": _list_runs()})
+            self._json_bytes(_runs_bytes())
             return
 
         if parsed.path == "/api/run":
@@ -234,7 +372,7 @@ class Handler(BaseHTTPRequestHandler):
 
         if parsed.path == "/api/events":
             run_id = (query.get("run_id") or [""])[0]
-            self._json({"events": _events_for_run(run_id)})
+            self._json_bytes(_events_bytes(run_id))
             return
 
         self._json({"error": "not found"}, status=404)
@@ -243,17 +381,29 @@ class Handler(BaseHTTPRequestHandler):
 def _infer_run_id_from_response_id(response_id: str | None) -> str | None:
     if not response_id or not EVENTS_PATH.exists():
         return None
-    for line in EVENTS_PATH.read_text(encoding="utf-8").splitlines():
-        if response_id not in line:
-            continue
-        try:
-            row = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        run_id = row.get("run_id")
-        if run_id:
-            return str(run_id)
-    return None
+    with _EVENTS_LOCK:
+        mm = _refresh_event_index()
+        end = _EVENTS_POS
+        found, scanned = _RESPONSE_RUN_IDS.get(response_id, (None, 0))
+        if found is None and scanned < end:
+            # Only bytes this response_id has not been checked against yet need scanning, and
+            # only lines that actually contain it are cut out and parsed.
+            needle = response_id.encode("utf-8")
+            hit = mm.find(needle, scanned, end)
+            while hit != -1:
+                line_start = max(mm.rfind(b"\n", scanned, hit) + 1, scanned)
+                line = _line_at(mm, line_start, end)
+                try:
+                    row = _loads(line)
+                except ValueError:
+                    row = None
+                run_id = row.get("run_id") if isinstance(row, dict) else None
+                if run_id:
+                    found = str(run_id)
+                    break
+                hit = mm.find(needle, line_start + len(line), end)
+            _RESPONSE_RUN_IDS[response_id] = (found, end)
+    return found
 
 
 def main() -> int:
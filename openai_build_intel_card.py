@@ -13,29 +13,42 @@ Repeatable workflow:
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import functools
 import json
 import os
 import sys
-import urllib.error
-import urllib.request
-import uuid
-from math import ceil
 from datetime import datetime, timezone
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import http_keepalive
 from discord_publish_log import DEFAULT_LOG_PATH
-from observability import run_with_observability
-from observability.context import build_observability_config
 from post_build_intel_card import extract_build_signals, post_discord_embed
 
 OPENAI_RESPONSES_URL = "https://api.openai.com/v1/responses"
+OPENAI_FILES_URL = "https://api.openai.com/v1/files"
+OPENAI_BATCHES_URL = "https://api.openai.com/v1/batches"
+# Batch states that can still produce output; anything else is final.
+OPENAI_BATCH_OPEN_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
 DEFAULT_MODEL = "gpt-5.2"
-PROMPT_VERSION = "build-intel-card.v1.2026-02-17"
+PROMPT_VERSION = "build-intel-card.v2.2026-10-16"
 DEFAULT_DAILY_TOKEN_BUDGET = 850_000
 DEFAULT_TOKEN_LEDGER_PATH = "logs/openai_token_usage.jsonl"
 DEFAULT_RESERVED_OUTPUT_TOKENS = 2000
 DEFAULT_OBSERVABILITY_MODE = "jsonl+mlflow"
 DEFAULT_OBSERVABILITY_LOG_PATH = "logs/dspy_observability.jsonl"
+DEFAULT_BATCH_DIR = "logs/build_intel_batches"
+
+# Artifact directories already created by this process.
+_ENSURED_DIRS: set[str] = set()
+
+# Both parsers accept bytes and raise ValueError subclasses on bad input.
+_loads = orjson.loads if orjson is not None else json.loads
 
 
 def clamp_text(value: str, max_len: int) -> str:
@@ -45,9 +58,16 @@ def clamp_text(value: str, max_len: int) -> str:
     return value[: max_len - 3].rstrip() + "..."
 
 
+def read_json(path: str) -> dict[str, Any]:
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+
 def read_snapshot(path: str) -> dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
+
+
+GEAR_SLOTS = ("Weapon", "Offhand", "Helm", "BodyArmour", "Gloves", "Boots", "Belt", "Amulet", "Ring", "Ring2")
 
 
 def summarize_snapshot(snapshot: dict[str, Any]) -> dict[str, Any]:
@@ -55,8 +75,8 @@ def summarize_snapshot(snapshot: dict[str, Any]) -> dict[str, Any]:
     char = items_payload.get("character", {})
     build = extract_build_signals(items_payload)
 
-    gear_slots = ["Weapon", "Offhand", "Helm", "BodyArmour", "Gloves", "Boots", "Belt", "Amulet", "Ring", "Ring2"]
-    gear = {slot: build["gear"].get(slot, "Unknown") for slot in gear_slots}
+    build_gear = build["gear"]
+    gear = {slot: build_gear.get(slot, "Unknown") for slot in GEAR_SLOTS}
 
     skill_names = sorted(set(build.get("skill_names", [])))
     support_names = sorted(set(build.get("support_names", [])))
@@ -90,86 +110,162 @@ def summarize_snapshot(snapshot: dict[str, Any]) -> dict[str, Any]:
     return summary
 
 
-def build_messages(summary: dict[str, Any]) -> tuple[str, str]:
-    system = (
-        "You are a Path of Exile build analyst. "
-        "Generate a high-signal Discord Build Intelligence Card from structured character data. "
-        "Be concise, concrete, and actionable. Avoid fluff."
-    )
-
-    schema_instructions = {
-        "required_output": {
-            "log_message": "string; must start with [LOG][build-intel]",
-            "embed": {
-                "title": "string",
-                "description": "string",
-                "color": "integer between 0 and 16777215",
-                "fields": [
-                    {"name": "Build Identity", "value": "string", "inline": False},
-                    {"name": "What The Build Is Trying To Do", "value": "string", "inline": False},
-                    {"name": "Current Gear Signal", "value": "string", "inline": False},
-                    {"name": "Liquid Market Snapshot", "value": "string", "inline": False},
-                    {"name": "Next 3 Moves", "value": "string with 3 numbered lines", "inline": False},
-                ],
-                "footer": {"text": "string"},
-            },
-            "analysis_version": PROMPT_VERSION,
-        }
+def compact_json(value: Any) -> str:
+    # Indentation and \u escapes cost input tokens without helping the model. Stdlib json keeps
+    # the prompt text identical whether or not orjson is installed.
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+SYSTEM_MSG = (
+    "You are a Path of Exile build analyst. "
+    "Generate a high-signal Discord Build Intelligence Card from structured character data. "
+    "Be concise, concrete, and actionable. Avoid fluff."
+)
+
+SCHEMA_INSTRUCTIONS = {
+    "required_output": {
+        "log_message": "string; must start with [LOG][build-intel]",
+        "embed": {
+            "title": "string",
+            "description": "string",
+            "color": "integer between 0 and 16777215",
+            "fields": [
+                {"name": "Build Identity", "value": "string", "inline": False},
+                {"name": "What The Build Is Trying To Do", "value": "string", "inline": False},
+                {"name": "Current Gear Signal", "value": "string", "inline": False},
+                {"name": "Liquid Market Snapshot", "value": "string", "inline": False},
+                {"name": "Next 3 Moves", "value": "string with 3 numbered lines", "inline": False},
+            ],
+            "footer": {"text": "string"},
+        },
+        "analysis_version": PROMPT_VERSION,
     }
+}
+
+# Everything in the user prompt except the character data is fixed for a prompt version.
+USER_MSG_PREFIX = (
+    f"Prompt version: {PROMPT_VERSION}\n"
+    "Create a polished but factual build card. Make inferences only from provided data.\n"
+    "If data is uncertain, say so briefly and still provide concrete next moves.\n"
+    "Return JSON only, no markdown.\n\n"
+    f"Output contract:\n{compact_json(SCHEMA_INSTRUCTIONS)}\n\n"
+    "Character data:\n"
+)
+
+
+# Several snapshots in one call share the instructions and output contract; cards come back in input order.
+BATCH_USER_MSG_PREFIX = (
+    f"Prompt version: {PROMPT_VERSION}\n"
+    "Create one polished but factual build card per character, in the order given. "
+    "Make inferences only from each character's own data.\n"
+    "If data is uncertain, say so briefly and still provide concrete next moves.\n"
+    "Return JSON only, no markdown.\n\n"
+    f"Output contract:\n{compact_json({'required_output': {'cards': [SCHEMA_INSTRUCTIONS['required_output']]}})}\n\n"
+    "Character data (one entry per card):\n"
+)
+
+
+def build_messages(summary: dict[str, Any]) -> tuple[str, str]:
+    return SYSTEM_MSG, USER_MSG_PREFIX + compact_json(summary)
 
-    user = (
-        f"Prompt version: {PROMPT_VERSION}\n"
-        "Create a polished but factual build card. Make inferences only from provided data.\n"
-        "If data is uncertain, say so briefly and still provide concrete next moves.\n"
-        "Return JSON only, no markdown.\n\n"
-        f"Output contract:\n{json.dumps(schema_instructions, indent=2)}\n\n"
-        f"Character data:\n{json.dumps(summary, indent=2)}"
-    )
 
-    return system, user
+def build_batch_messages(summaries: list[dict[str, Any]]) -> tuple[str, str]:
+    return SYSTEM_MSG, BATCH_USER_MSG_PREFIX + compact_json(summaries)
 
 
 def estimate_tokens(text: str) -> int:
     # Lightweight estimate for preflight budget checks without tokenizer deps.
-    return max(1, ceil(len(text) / 4))
+    return max(1, (len(text) + 3) // 4)
 
 
 def append_jsonl(path: str, payload: dict[str, Any]) -> None:
     directory = os.path.dirname(path)
     if directory:
         os.makedirs(directory, exist_ok=True)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(payload) + "\n")
+    if orjson is not None:
+        line = orjson.dumps(payload) + b"\n"
+    else:
+        line = (json.dumps(payload) + "\n").encode("utf-8")
+    # A single write on an append-mode handle keeps the row intact for concurrent runs.
+    with open(path, "ab") as f:
+        f.write(line)
 
 
 def utc_day(iso_ts: str) -> str:
     return iso_ts[:10]
 
 
+def daily_aggregate_path(ledger_path: str) -> str:
+    return os.path.splitext(ledger_path)[0] + ".daily.json"
+
+
+def load_daily_aggregate(path: str) -> dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            aggregate = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(aggregate, dict) or not isinstance(aggregate.get("totals"), dict):
+        return {}
+    return aggregate
+
+
+def write_daily_aggregate(path: str, aggregate: dict[str, Any]) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(aggregate, f)
+    os.replace(tmp_path, path)
+
+
 def used_tokens_today(ledger_path: str, day: str, model: str) -> int:
-    total = 0
+    # Successful-call totals per model and day live in a small sidecar next to the ledger, along
+    # with the ledger byte offset they cover; each run only parses rows appended since then.
     if not os.path.exists(ledger_path):
-        return total
-    with open(ledger_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                row = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if row.get("event") != "openai_call_completed":
-                continue
-            if row.get("status") != "success":
-                continue
-            if row.get("model") != model:
-                continue
-            ts = str(row.get("timestamp_utc", ""))
-            if utc_day(ts) != day:
-                continue
-            total += int(row.get("actual_total_tokens") or 0)
-    return total
+        return 0
+    aggregate_path = daily_aggregate_path(ledger_path)
+    aggregate = load_daily_aggregate(aggregate_path)
+    stat = os.stat(ledger_path)
+    offset = aggregate.get("ledger_offset", 0)
+    if aggregate.get("ledger_inode") != stat.st_ino or not isinstance(offset, int) or offset > stat.st_size:
+        # Missing sidecar, or the ledger was replaced/truncated: rebuild from the start.
+        aggregate = {"ledger_inode": stat.st_ino, "ledger_offset": 0, "totals": {}}
+        offset = 0
+
+    if offset < stat.st_size:
+        totals: dict[str, dict[str, int]] = aggregate["totals"]
+        with open(ledger_path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Partially written last row; count it once it is complete.
+                    break
+                offset += len(raw)
+                # Only completed calls count; skip other events without parsing them.
+                if b'"openai_call_completed"' not in raw:
+                    continue
+                try:
+                    row = _loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(row, dict):
+                    continue
+                if row.get("event") != "openai_call_completed":
+                    continue
+                if row.get("status") != "success":
+                    continue
+                row_model = row.get("model")
+                if not isinstance(row_model, str):
+                    continue
+                row_day = utc_day(str(row.get("timestamp_utc", "")))
+                by_day = totals.setdefault(row_model, {})
+                by_day[row_day] = by_day.get(row_day, 0) + int(row.get("actual_total_tokens") or 0)
+        aggregate["ledger_offset"] = offset
+        try:
+            write_daily_aggregate(aggregate_path, aggregate)
+        except OSError:
+            pass
+
+    return int(aggregate["totals"].get(model, {}).get(day, 0))
 
 
 def extract_total_tokens(response: dict[str, Any]) -> int | None:
@@ -183,8 +279,83 @@ def extract_total_tokens(response: dict[str, Any]) -> int | None:
     return None
 
 
-def call_openai_responses(api_key: str, model: str, system_msg: str, user_msg: str) -> dict[str, Any]:
-    payload = {
+# Sent verbatim on every call; strict structured output for the card.
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "name": "build_intel_card",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["log_message", "embed", "analysis_version"],
+        "properties": {
+            "log_message": {"type": "string"},
+            "analysis_version": {"type": "string"},
+            "embed": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["title", "description", "color", "fields", "footer"],
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "color": {"type": "integer", "minimum": 0, "maximum": 16777215},
+                    "fields": {
+                        "type": "array",
+                        "minItems": 5,
+                        "maxItems": 5,
+                        "items": {
+                            "type": "object",
+                            "additionalProperties": False,
+                            "required": ["name", "value", "inline"],
+                            "properties": {
+                                "name": {"type": "string"},
+                                "value": {"type": "string"},
+                                "inline": {"type": "boolean"},
+                            },
+                        },
+                    },
+                    "footer": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["text"],
+                        "properties": {"text": {"type": "string"}},
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+def batch_response_format(count: int) -> dict[str, Any]:
+    # Structured outputs need an object at the root, so the cards are wrapped in {"cards": [...]}.
+    return {
+        "type": "json_schema",
+        "name": "build_intel_cards",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["cards"],
+            "properties": {
+                "cards": {
+                    "type": "array",
+                    "minItems": count,
+                    "maxItems": count,
+                    "items": RESPONSE_FORMAT["schema"],
+                },
+            },
+        },
+    }
+
+
+def build_responses_payload(
+    model: str,
+    system_msg: str,
+    user_msg: str,
+    response_format: dict[str, Any] = RESPONSE_FORMAT,
+) -> dict[str, Any]:
+    return {
         "model": model,
         "input": [
             {
@@ -196,73 +367,84 @@ def call_openai_responses(api_key: str, model: str, system_msg: str, user_msg: s
                 "content": [{"type": "input_text", "text": user_msg}],
             },
         ],
-        "text": {
-            "format": {
-                "type": "json_schema",
-                "name": "build_intel_card",
-                "strict": True,
-                "schema": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "required": ["log_message", "embed", "analysis_version"],
-                    "properties": {
-                        "log_message": {"type": "string"},
-                        "analysis_version": {"type": "string"},
-                        "embed": {
-                            "type": "object",
-                            "additionalProperties": False,
-                            "required": ["title", "description", "color", "fields", "footer"],
-                            "properties": {
-                                "title": {"type": "string"},
-                                "description": {"type": "string"},
-                                "color": {"type": "integer", "minimum": 0, "maximum": 16777215},
-                                "fields": {
-                                    "type": "array",
-                                    "minItems": 5,
-                                    "maxItems": 5,
-                                    "items": {
-                                        "type": "object",
-                                        "additionalProperties": False,
-                                        "required": ["name", "value", "inline"],
-                                        "properties": {
-                                            "name": {"type": "string"},
-                                            "value": {"type": "string"},
-                                            "inline": {"type": "boolean"},
-                                        },
-                                    },
-                                },
-                                "footer": {
-                                    "type": "object",
-                                    "additionalProperties": False,
-                                    "required": ["text"],
-                                    "properties": {"text": {"type": "string"}},
-                                },
-                            },
-                        },
-                    },
-                },
-            }
-        },
+        "text": {"format": response_format},
     }
 
-    req = urllib.request.Request(
-        OPENAI_RESPONSES_URL,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "User-Agent": "PoE-Assistant/1.0",
-        },
-        method="POST",
-    )
 
-    try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            return json.loads(body)
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
-        raise RuntimeError(f"OpenAI API request failed (HTTP {exc.code}): {detail}") from exc
+def call_openai_responses(
+    api_key: str,
+    model: str,
+    system_msg: str,
+    user_msg: str,
+    response_format: dict[str, Any] = RESPONSE_FORMAT,
+) -> dict[str, Any]:
+    payload = build_responses_payload(model, system_msg, user_msg, response_format)
+    raw_body = openai_request("POST", OPENAI_RESPONSES_URL, api_key, json.dumps(payload).encode("utf-8"))
+    return _loads(raw_body)
+
+
+def openai_request(
+    method: str,
+    url: str,
+    api_key: str,
+    body: bytes | None = None,
+    content_type: str = "application/json",
+) -> bytes:
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "User-Agent": "PoE-Assistant/1.0",
+        "Connection": "keep-alive",
+    }
+    if body is not None:
+        headers["Content-Type"] = content_type
+    # The observability fallback can send the same request twice in one run, and batch submit/drain
+    # make several calls; the shared keep-alive connections let later calls skip the TCP/TLS handshake.
+    resp = http_keepalive.request(method, url, body, headers, timeout=60)
+    if resp.status < 200 or resp.status >= 300:
+        detail = resp.body.decode("utf-8", errors="replace")
+        raise RuntimeError(f"OpenAI API request failed (HTTP {resp.status}): {detail}")
+    return resp.body
+
+
+def submit_openai_batch(api_key: str, custom_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+    request_line = {"custom_id": custom_id, "method": "POST", "url": "/v1/responses", "body": payload}
+    boundary = os.urandom(16).hex()
+    form = (
+        (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="purpose"\r\n\r\n'
+            "batch\r\n"
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{custom_id}.jsonl"\r\n'
+            "Content-Type: application/jsonl\r\n\r\n"
+        ).encode("utf-8")
+        + json.dumps(request_line).encode("utf-8")
+        + f"\n\r\n--{boundary}--\r\n".encode("utf-8")
+    )
+    uploaded = _loads(
+        openai_request("POST", OPENAI_FILES_URL, api_key, form, f"multipart/form-data; boundary={boundary}")
+    )
+    batch_request = {"input_file_id": uploaded["id"], "endpoint": "/v1/responses", "completion_window": "24h"}
+    return _loads(openai_request("POST", OPENAI_BATCHES_URL, api_key, json.dumps(batch_request).encode("utf-8")))
+
+
+def fetch_openai_batch_response(api_key: str, batch: dict[str, Any], custom_id: str) -> tuple[dict[str, Any] | None, str]:
+    for file_key in ("output_file_id", "error_file_id"):
+        file_id = batch.get(file_key)
+        if not file_id:
+            continue
+        content = openai_request("GET", f"{OPENAI_FILES_URL}/{file_id}/content", api_key)
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            row = _loads(line)
+            if row.get("custom_id") != custom_id:
+                continue
+            response = row.get("response") or {}
+            if response.get("status_code") == 200 and isinstance(response.get("body"), dict):
+                return response["body"], ""
+            return None, compact_json(row.get("error") or response.get("body"))
+    return None, f"OpenAI batch {batch.get('id')} ended with status {batch.get('status')}"
 
 
 def extract_model_json(response: dict[str, Any]) -> dict[str, Any]:
@@ -278,6 +460,15 @@ def extract_model_json(response: dict[str, Any]) -> dict[str, Any]:
     raise RuntimeError("OpenAI response did not include parseable JSON output.")
 
 
+REQUIRED_FIELD_NAMES = (
+    "Build Identity",
+    "What The Build Is Trying To Do",
+    "Current Gear Signal",
+    "Liquid Market Snapshot",
+    "Next 3 Moves",
+)
+
+
 def sanitize_card(card: dict[str, Any]) -> dict[str, Any]:
     if not str(card.get("log_message", "")).startswith("[LOG][build-intel]"):
         card["log_message"] = "[LOG][build-intel] " + str(card.get("log_message", "Generated build intelligence card.")).strip()
@@ -288,7 +479,7 @@ def sanitize_card(card: dict[str, Any]) -> dict[str, Any]:
     embed["color"] = int(embed.get("color", 0xE67E22))
 
     fields = []
-    for field in embed.get("fields", [])[:5]:
+    for field in (embed.get("fields") or ())[:5]:
         fields.append(
             {
                 "name": clamp_text(str(field.get("name", "Field")), 256),
@@ -297,15 +488,8 @@ def sanitize_card(card: dict[str, Any]) -> dict[str, Any]:
             }
         )
 
-    required_field_names = [
-        "Build Identity",
-        "What The Build Is Trying To Do",
-        "Current Gear Signal",
-        "Liquid Market Snapshot",
-        "Next 3 Moves",
-    ]
     while len(fields) < 5:
-        missing_name = required_field_names[len(fields)]
+        missing_name = REQUIRED_FIELD_NAMES[len(fields)]
         fields.append({"name": missing_name, "value": "Insufficient data.", "inline": False})
 
     embed["fields"] = fields
@@ -319,9 +503,19 @@ def sanitize_card(card: dict[str, Any]) -> dict[str, Any]:
 
 
 def write_run_artifact(path: str, artifact: dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(artifact, f, indent=2)
+    directory = os.path.dirname(path)
+    if directory and directory not in _ENSURED_DIRS:
+        os.makedirs(directory, exist_ok=True)
+        _ENSURED_DIRS.add(directory)
+    if orjson is not None:
+        data = orjson.dumps(artifact, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(artifact, indent=2).encode("utf-8")
+    # Write the whole artifact and swap it in, so readers never see a half-written file.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
 
 
 def default_run_artifact_path() -> str:
@@ -329,9 +523,20 @@ def default_run_artifact_path() -> str:
     return f"logs/build_intel_runs/{ts}.json"
 
 
+def batch_artifact_path(path: str, index: int, count: int) -> str:
+    if count == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{index + 1}{ext}"
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate and post Build Intelligence Card using OpenAI GPT-5.2")
-    parser.add_argument("--snapshot", required=True, help="Input snapshot JSON from poe_market_pipeline.py --output")
+    parser.add_argument(
+        "--snapshot",
+        nargs="+",
+        help="Input snapshot JSON from poe_market_pipeline.py --output; several are carded in one OpenAI call",
+    )
     parser.add_argument("--model", default=DEFAULT_MODEL, help="OpenAI model (default: gpt-5.2)")
     parser.add_argument("--openai-api-key", default=os.environ.get("OPENAI_API_KEY"), help="OpenAI API key")
     parser.add_argument("--webhook-url", default=os.environ.get("DISCORD_WEBHOOK_URL"), help="Discord webhook URL")
@@ -372,37 +577,317 @@ def parse_args() -> argparse.Namespace:
         help="Fail if DSPy observability runtime errors instead of falling back to direct OpenAI call",
     )
     parser.add_argument("--dry-run", action="store_true", help="Generate card but do not post")
+    parser.add_argument(
+        "--async-batch",
+        action="store_true",
+        help="Submit the call to the OpenAI Batch API (half price, up to 24h) instead of calling it now",
+    )
+    parser.add_argument(
+        "--drain-batches",
+        action="store_true",
+        help="Collect finished --async-batch calls and post their cards; --snapshot is not needed",
+    )
+    parser.add_argument(
+        "--batch-dir",
+        default=os.environ.get("OPENAI_BUILD_INTEL_BATCH_DIR", DEFAULT_BATCH_DIR),
+        help=f"Directory for pending/finished async batch runs (default: {DEFAULT_BATCH_DIR})",
+    )
     return parser.parse_args()
 
 
+def reserved_batch_tokens(batch_dir: str, model: str) -> int:
+    # Submitted batch runs are only logged as completed when drained; until then their estimate
+    # still has to count against the budget, or repeated submits could overspend it.
+    pending_dir = os.path.join(batch_dir, "pending")
+    try:
+        names = [name for name in os.listdir(pending_dir) if name.endswith(".json")]
+    except FileNotFoundError:
+        return 0
+    reserved = 0
+    for name in names:
+        try:
+            run = read_json(os.path.join(pending_dir, name))
+        except (OSError, ValueError):
+            continue
+        if run.get("model") == model and not run.get("tokens_logged"):
+            reserved += int(run.get("estimated_total_tokens") or 0)
+    return reserved
+
+
+def log_call_error(args: argparse.Namespace, run: dict[str, Any], error: str) -> None:
+    append_jsonl(
+        args.token_ledger_path,
+        {
+            "event": "openai_call_completed",
+            "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+            "run_id": run["run_id"],
+            "model": run["model"],
+            "snapshot_path": ",".join(run["snapshot_paths"]),
+            "status": "error",
+            "error": error,
+            "daily_budget_tokens": run["daily_budget_tokens"],
+            "used_today_tokens": run["used_today"],
+            "estimated_input_tokens": run["estimated_input_tokens"],
+            "reserved_output_tokens": run["reserved_output_tokens"],
+            "estimated_total_tokens": run["estimated_total_tokens"],
+        },
+    )
+
+
+def log_call_success(args: argparse.Namespace, run: dict[str, Any], raw_response: dict[str, Any]) -> int:
+    actual_total_tokens = extract_total_tokens(raw_response)
+    if actual_total_tokens is None:
+        actual_total_tokens = run["estimated_total_tokens"]
+    append_jsonl(
+        args.token_ledger_path,
+        {
+            "event": "openai_call_completed",
+            "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+            "run_id": run["run_id"],
+            "model": run["model"],
+            "snapshot_path": ",".join(run["snapshot_paths"]),
+            "status": "success",
+            "daily_budget_tokens": run["daily_budget_tokens"],
+            "used_today_tokens_before_call": run["used_today"],
+            "estimated_input_tokens": run["estimated_input_tokens"],
+            "reserved_output_tokens": run["reserved_output_tokens"],
+            "estimated_total_tokens": run["estimated_total_tokens"],
+            "actual_total_tokens": actual_total_tokens,
+            "response_id": raw_response.get("id"),
+        },
+    )
+    return actual_total_tokens
+
+
+def publish_cards(
+    args: argparse.Namespace,
+    run: dict[str, Any],
+    raw_response: dict[str, Any],
+    actual_total_tokens: int,
+    base_artifact_path: str,
+) -> None:
+    summaries = run["summaries"]
+    model_json = extract_model_json(raw_response)
+    model_cards = model_json.get("cards", []) if len(summaries) > 1 else [model_json]
+    if len(model_cards) != len(summaries):
+        raise RuntimeError(f"OpenAI response returned {len(model_cards)} cards for {len(summaries)} snapshots.")
+
+    posted_cards: list[int] = run.setdefault("posted_cards", [])
+    for index, (path, summary, model_card) in enumerate(zip(run["snapshot_paths"], summaries, model_cards)):
+        if index in posted_cards:
+            continue
+        card = sanitize_card(model_card)
+        run_artifact_path = batch_artifact_path(base_artifact_path, index, len(summaries))
+        artifact = {
+            "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+            "prompt_version": PROMPT_VERSION,
+            "model": run["model"],
+            "snapshot_path": path,
+            "summary": summary,
+            "token_budget": {
+                "day_utc": run["day"],
+                "daily_budget_tokens": run["daily_budget_tokens"],
+                "used_today_tokens_before_call": run["used_today"],
+                "remaining_before_call_tokens": run["remaining_before"],
+                "estimated_total_tokens": run["estimated_total_tokens"],
+                "actual_total_tokens": actual_total_tokens,
+            },
+            "system_prompt": run["system_msg"],
+            "user_prompt": run["user_msg"],
+            "raw_openai_response": raw_response,
+            "model_card": model_card,
+            "sanitized_card": card,
+            "observability": run["observability_meta"],
+            "observability_errors": run["observability_errors"],
+            "posted": False,
+        }
+        if len(summaries) > 1:
+            # Token counts above are for the whole batched call, shared by every card in it.
+            artifact["batch"] = {"index": index, "size": len(summaries)}
+        if run.get("openai_batch_id"):
+            artifact["openai_batch_id"] = run["openai_batch_id"]
+
+        if args.dry_run:
+            write_run_artifact(run_artifact_path, artifact)
+            print(json.dumps(card, indent=2))
+            print(f"Run artifact saved: {run_artifact_path}")
+            continue
+
+        post_discord_embed(args.webhook_url, args.username, card["log_message"], [card["embed"]], log_path=args.log_path)
+        posted_cards.append(index)
+        artifact["posted"] = True
+        artifact["log_path"] = args.log_path
+        write_run_artifact(run_artifact_path, artifact)
+
+        print(f"Posted AI Build Intelligence Card to Discord. Artifact: {run_artifact_path}. Publish log: {args.log_path}")
+
+
+def submit_batch_run(args: argparse.Namespace, run: dict[str, Any], response_format: dict[str, Any]) -> int:
+    payload = build_responses_payload(run["model"], run["system_msg"], run["user_msg"], response_format)
+    try:
+        batch = submit_openai_batch(args.openai_api_key, run["run_id"], payload)
+    except Exception as exc:
+        log_call_error(args, run, str(exc))
+        raise
+
+    run["openai_batch_id"] = batch["id"]
+    run["submitted_at_utc"] = datetime.now(timezone.utc).isoformat()
+    pending_path = os.path.join(args.batch_dir, "pending", f"{run['run_id']}.json")
+    write_run_artifact(pending_path, run)
+    append_jsonl(
+        args.token_ledger_path,
+        {
+            "event": "openai_batch_submitted",
+            "timestamp_utc": run["submitted_at_utc"],
+            "run_id": run["run_id"],
+            "model": run["model"],
+            "snapshot_path": ",".join(run["snapshot_paths"]),
+            "openai_batch_id": batch["id"],
+            "estimated_total_tokens": run["estimated_total_tokens"],
+        },
+    )
+    print(f"Submitted OpenAI batch {batch['id']}. Pending run: {pending_path}. Post it later with --drain-batches.")
+    return 0
+
+
+def drain_batch_runs(args: argparse.Namespace) -> int:
+    pending_dir = os.path.join(args.batch_dir, "pending")
+    try:
+        names = sorted(name for name in os.listdir(pending_dir) if name.endswith(".json"))
+    except FileNotFoundError:
+        names = []
+
+    finished = failed = waiting = unposted = 0
+    for name in names:
+        pending_path = os.path.join(pending_dir, name)
+        run = read_json(pending_path)
+        raw_response = run.get("raw_openai_response")
+        if raw_response is None:
+            batch = _loads(openai_request("GET", f"{OPENAI_BATCHES_URL}/{run['openai_batch_id']}", args.openai_api_key))
+            if batch.get("status") in OPENAI_BATCH_OPEN_STATUSES:
+                waiting += 1
+                continue
+
+            raw_response, error = fetch_openai_batch_response(args.openai_api_key, batch, run["run_id"])
+            run["openai_batch"] = batch
+            if raw_response is None:
+                log_call_error(args, run, error)
+                write_run_artifact(os.path.join(args.batch_dir, "failed", name), run)
+                os.remove(pending_path)
+                print(f"WARNING: OpenAI batch run {run['run_id']} failed: {error}", file=sys.stderr)
+                failed += 1
+                continue
+
+            # Record the spend once and keep the response on the pending run, so a failed post is
+            # retried by the next drain without fetching or counting the tokens again.
+            run["actual_total_tokens"] = log_call_success(args, run, raw_response)
+            run["tokens_logged"] = True
+            run["raw_openai_response"] = raw_response
+            write_run_artifact(pending_path, run)
+
+        # One drain can publish several runs; keep their artifacts apart.
+        root, ext = os.path.splitext(args.run_artifact or default_run_artifact_path())
+        try:
+            publish_cards(args, run, raw_response, run["actual_total_tokens"], f"{root}-{run['run_id']}{ext}")
+        except Exception as exc:  # noqa: BLE001
+            # Keep the run pending with the cards posted so far; the next drain posts the rest.
+            write_run_artifact(pending_path, run)
+            print(f"WARNING: posting OpenAI batch run {run['run_id']} failed: {exc}", file=sys.stderr)
+            unposted += 1
+            continue
+        if args.dry_run:
+            # Nothing was posted; leave the run pending for a real drain.
+            unposted += 1
+            continue
+
+        write_run_artifact(os.path.join(args.batch_dir, "done", name), run)
+        os.remove(pending_path)
+        finished += 1
+
+    print(
+        f"Drained OpenAI batches: {finished} posted, {failed} failed, {unposted} awaiting post, "
+        f"{waiting} still pending."
+    )
+    return 0
+
+
+def load_observability(args: argparse.Namespace) -> tuple[Any, Any]:
+    # The observability stack pulls in DSPy and MLflow, which are slow to import; skip it when off.
+    from observability import run_with_observability
+    from observability.context import build_observability_config
+
+    config = build_observability_config(
+        mode=args.observability,
+        log_path=args.observability_log_path,
+        dspy_strict=args.dspy_strict,
+    )
+    return config, run_with_observability
+
+
 def main() -> int:
     args = parse_args()
 
     if not args.openai_api_key:
         print("ERROR: Provide --openai-api-key or set OPENAI_API_KEY.", file=sys.stderr)
         return 2
-    if not args.dry_run and not args.webhook_url:
+    if not args.dry_run and not args.async_batch and not args.webhook_url:
         print("ERROR: Provide --webhook-url or set DISCORD_WEBHOOK_URL.", file=sys.stderr)
         return 2
+    if args.drain_batches:
+        return drain_batch_runs(args)
+    if not args.snapshot:
+        print("ERROR: Provide --snapshot (or --drain-batches).", file=sys.stderr)
+        return 2
 
-    snapshot = read_snapshot(args.snapshot)
-    summary = summarize_snapshot(snapshot)
-    system_msg, user_msg = build_messages(summary)
-    observability_config = build_observability_config(
-        mode=args.observability,
-        log_path=args.observability_log_path,
-        dspy_strict=args.dspy_strict,
-    )
-
+    snapshot_paths: list[str] = args.snapshot
     now_iso = datetime.now(timezone.utc).isoformat()
     day = utc_day(now_iso)
+    observability_config = None
+    # The observability import, the ledger tail and snapshot parsing don't depend on each other;
+    # overlap them instead of paying for each in turn.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        used_today_future = pool.submit(used_tokens_today, args.token_ledger_path, day, args.model)
+        observability_future = None
+        if args.observability != "off" and not args.async_batch:
+            observability_future = pool.submit(load_observability, args)
+        # Only the summaries are used from here on; don't keep the full item dumps alive through the call.
+        summaries = [summarize_snapshot(read_snapshot(path)) for path in snapshot_paths]
+        used_today = used_today_future.result()
+        reserved_tokens = reserved_batch_tokens(args.batch_dir, args.model)
+        if observability_future is not None:
+            observability_config, run_with_observability = observability_future.result()
+
+    if len(summaries) == 1:
+        system_msg, user_msg = build_messages(summaries[0])
+        response_format = RESPONSE_FORMAT
+    else:
+        system_msg, user_msg = build_batch_messages(summaries)
+        response_format = batch_response_format(len(summaries))
+    runner = call_openai_responses
+    if response_format is not RESPONSE_FORMAT:
+        runner = functools.partial(call_openai_responses, response_format=response_format)
+
     estimated_input_tokens = estimate_tokens(system_msg) + estimate_tokens(user_msg)
     estimated_total_tokens = estimated_input_tokens + max(0, args.reserve_output_tokens)
-    used_today = used_tokens_today(args.token_ledger_path, day, args.model)
-    remaining_before = args.daily_token_budget - used_today
-    run_id = uuid.uuid4().hex[:12]
-    observability_meta: dict[str, Any] = {"enabled": False, "mode": "off", "event_count": 0}
-    observability_errors: list[str] = []
+    remaining_before = args.daily_token_budget - used_today - reserved_tokens
+    run: dict[str, Any] = {
+        "run_id": os.urandom(6).hex(),
+        "model": args.model,
+        "snapshot_paths": snapshot_paths,
+        "summaries": summaries,
+        "system_msg": system_msg,
+        "user_msg": user_msg,
+        "day": day,
+        "daily_budget_tokens": args.daily_token_budget,
+        "used_today": used_today,
+        "reserved_batch_tokens": reserved_tokens,
+        "remaining_before": remaining_before,
+        "estimated_input_tokens": estimated_input_tokens,
+        "reserved_output_tokens": args.reserve_output_tokens,
+        "estimated_total_tokens": estimated_total_tokens,
+        "observability_meta": {"enabled": False, "mode": "off", "event_count": 0},
+        "observability_errors": [],
+    }
 
     if estimated_total_tokens > remaining_before:
         append_jsonl(
@@ -410,11 +895,12 @@ def main() -> int:
             {
                 "event": "openai_preflight_blocked",
                 "timestamp_utc": now_iso,
-                "run_id": run_id,
+                "run_id": run["run_id"],
                 "model": args.model,
-                "snapshot_path": args.snapshot,
+                "snapshot_path": ",".join(snapshot_paths),
                 "daily_budget_tokens": args.daily_token_budget,
                 "used_today_tokens": used_today,
+                "reserved_batch_tokens": reserved_tokens,
                 "remaining_before_tokens": remaining_before,
                 "estimated_input_tokens": estimated_input_tokens,
                 "reserved_output_tokens": args.reserve_output_tokens,
@@ -423,32 +909,35 @@ def main() -> int:
         )
         print(
             "ERROR: Daily token budget would be exceeded "
-            f"(model={args.model}, day={day}, used={used_today}, remaining={remaining_before}, "
+            f"(model={args.model}, day={day}, used={used_today}, reserved_by_pending_batches={reserved_tokens}, "
+            f"remaining={remaining_before}, "
             f"estimated_call={estimated_total_tokens}, budget={args.daily_token_budget}).",
             file=sys.stderr,
         )
         return 3
+    if args.async_batch:
+        return submit_batch_run(args, run, response_format)
     try:
-        if observability_config.enabled:
+        if observability_config is not None and observability_config.enabled:
             try:
                 observed = run_with_observability(
                     config=observability_config,
-                    run_id=run_id,
+                    run_id=run["run_id"],
                     model=args.model,
-                    snapshot_path=args.snapshot,
+                    snapshot_path=",".join(snapshot_paths),
                     prompt_version=PROMPT_VERSION,
                     api_key=args.openai_api_key,
                     system_msg=system_msg,
                     user_msg=user_msg,
-                    runner=call_openai_responses,
+                    runner=runner,
                 )
                 raw_response = observed.raw_response
-                observability_meta = observed.observability
+                run["observability_meta"] = observed.observability
             except Exception as exc:
                 if observability_config.dspy_strict:
                     raise
-                observability_errors.append(str(exc))
-                observability_meta = {
+                run["observability_errors"].append(str(exc))
+                run["observability_meta"] = {
                     "enabled": True,
                     "mode": observability_config.mode,
                     "log_path": observability_config.log_path,
@@ -456,90 +945,15 @@ def main() -> int:
                     "fallback_used": True,
                     "event_count": 0,
                 }
-                raw_response = call_openai_responses(args.openai_api_key, args.model, system_msg, user_msg)
+                raw_response = runner(args.openai_api_key, args.model, system_msg, user_msg)
         else:
-            raw_response = call_openai_responses(args.openai_api_key, args.model, system_msg, user_msg)
+            raw_response = runner(args.openai_api_key, args.model, system_msg, user_msg)
     except Exception as exc:
-        append_jsonl(
-            args.token_ledger_path,
-            {
-                "event": "openai_call_completed",
-                "timestamp_utc": datetime.now(timezone.utc).isoformat(),
-                "run_id": run_id,
-                "model": args.model,
-                "snapshot_path": args.snapshot,
-                "status": "error",
-                "error": str(exc),
-                "daily_budget_tokens": args.daily_token_budget,
-                "used_today_tokens": used_today,
-                "estimated_input_tokens": estimated_input_tokens,
-                "reserved_output_tokens": args.reserve_output_tokens,
-                "estimated_total_tokens": estimated_total_tokens,
-            },
-        )
+        log_call_error(args, run, str(exc))
         raise
 
-    actual_total_tokens = extract_total_tokens(raw_response)
-    if actual_total_tokens is None:
-        actual_total_tokens = estimated_total_tokens
-    append_jsonl(
-        args.token_ledger_path,
-        {
-            "event": "openai_call_completed",
-            "timestamp_utc": datetime.now(timezone.utc).isoformat(),
-            "run_id": run_id,
-            "model": args.model,
-            "snapshot_path": args.snapshot,
-            "status": "success",
-            "daily_budget_tokens": args.daily_token_budget,
-            "used_today_tokens_before_call": used_today,
-            "estimated_input_tokens": estimated_input_tokens,
-            "reserved_output_tokens": args.reserve_output_tokens,
-            "estimated_total_tokens": estimated_total_tokens,
-            "actual_total_tokens": actual_total_tokens,
-            "response_id": raw_response.get("id"),
-        },
-    )
-    model_card = extract_model_json(raw_response)
-    card = sanitize_card(model_card)
-
-    run_artifact_path = args.run_artifact or default_run_artifact_path()
-    artifact = {
-        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
-        "prompt_version": PROMPT_VERSION,
-        "model": args.model,
-        "snapshot_path": args.snapshot,
-        "summary": summary,
-        "token_budget": {
-            "day_utc": day,
-            "daily_budget_tokens": args.daily_token_budget,
-            "used_today_tokens_before_call": used_today,
-            "remaining_before_call_tokens": remaining_before,
-            "estimated_total_tokens": estimated_total_tokens,
-            "actual_total_tokens": actual_total_tokens,
-        },
-        "system_prompt": system_msg,
-        "user_prompt": user_msg,
-        "raw_openai_response": raw_response,
-        "model_card": model_card,
-        "sanitized_card": card,
-        "observability": observability_meta,
-        "observability_errors": observability_errors,
-        "posted": False,
-    }
-
-    if args.dry_run:
-        write_run_artifact(run_artifact_path, artifact)
-        print(json.dumps(card, indent=2))
-        print(f"Run artifact saved: {run_artifact_path}")
-        return 0
-
-    post_discord_embed(args.webhook_url, args.username, card["log_message"], [card["embed"]], log_path=args.log_path)
-    artifact["posted"] = True
-    artifact["log_path"] = args.log_path
-    write_run_artifact(run_artifact_path, artifact)
-
-    print(f"Posted AI Build Intelligence Card to Discord. Artifact: {run_artifact_path}. Publish log: {args.log_path}")
+    actual_total_tokens = log_call_success(args, run, raw_response)
+    publish_cards(args, run, raw_response, actual_total_tokens, args.run_artifact or default_run_artifact_path())
     return 0
 
 
@@ -14,12 +14,18 @@ import argparse
 import json
 import re
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import http_keepalive
+from http_keepalive import HttpResult
+
 REALM_MAP = {
     "pc": "pc",
     "xbox": "xbox",
@@ -27,13 +33,21 @@ REALM_MAP = {
 }
 
 HOST = "https://www.pathofexile.com"
+MAX_REDIRECTS = 5
+
+_POESESSID_RE = re.compile(r"[0-9a-fA-F]{32}")
+_WHITESPACE_RE = re.compile(r"\s+")
+_DISCRIMINATOR_RE = re.compile(r"(.*)[#\-]")
+# Matched against the raw page bytes so the whole profile page never has to be decoded.
+_PROFILE_RE = re.compile(rb"/view-profile/([^/]+)/characters")
+
+_loads = orjson.loads if orjson is not None else json.loads
 
 
-@dataclass
-class HttpResult:
-    status: int
-    body: str
-    headers: dict[str, str]
+def dumps_pretty(payload: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(payload, indent=2)
 
 
 class PoeApiError(RuntimeError):
@@ -78,7 +92,7 @@ def prompt_yes_no(prompt: str, default_yes: bool = True) -> bool:
 def prompt_poesessid() -> str:
     while True:
         value = input("Enter POESESSID (32 hex chars): ").strip()
-        if re.fullmatch(r"[0-9a-fA-F]{32}", value):
+        if _POESESSID_RE.fullmatch(value):
             return value
         print("Invalid POESESSID format. Expected 32 hex characters.")
 
@@ -86,10 +100,10 @@ def prompt_poesessid() -> str:
 def normalize_account_name(raw: str, realm: str) -> str:
     value = raw.strip()
     if realm == "pc":
-        value = re.sub(r"\s+", "", value)
+        value = _WHITESPACE_RE.sub("", value)
     else:
         value = value.replace(" ", "+")
-    value = re.sub(r"(.*)[#\-]", r"\1#", value)
+    value = _DISCRIMINATOR_RE.sub(r"\1#", value)
     return value
 
 
@@ -98,14 +112,13 @@ def http_get(url: str, poesessid: str | None = None) -> HttpResult:
     if poesessid:
         headers["Cookie"] = f"POESESSID={poesessid}"
 
-    req = urllib.request.Request(url, headers=headers, method="GET")
-    try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            return HttpResult(status=resp.status, body=body, headers=dict(resp.headers.items()))
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace") if e.fp else ""
-        return HttpResult(status=e.code, body=body, headers=dict(e.headers.items()) if e.headers else {})
+    for _ in range(MAX_REDIRECTS):
+        resp = http_keepalive.request("GET", url, headers=headers, timeout=20)
+        location = resp.headers.get("Location") or resp.headers.get("location")
+        if resp.status not in (301, 302, 303, 307, 308) or not location:
+            return resp
+        url = urllib.parse.urljoin(url, location)
+    return resp
 
 
 def get_characters(account_name: str, realm: str, poesessid: str | None) -> list[dict[str, Any]]:
@@ -123,7 +136,7 @@ def get_characters(account_name: str, realm: str, poesessid: str | None) -> list
         raise PoeApiError(f"Failed to fetch characters (HTTP {resp.status}).")
 
     try:
-        data = json.loads(resp.body)
+        data = _loads(resp.body)
     except json.JSONDecodeError as e:
         raise PoeApiError(f"Character list response was not valid JSON: {e}") from e
 
@@ -148,11 +161,11 @@ def get_canonical_account_name(account_name: str, poesessid: str | None) -> str:
     if resp.status != 200:
         raise PoeApiError(f"Failed to fetch profile page for account canonicalization (HTTP {resp.status}).")
 
-    match = re.search(r"/view-profile/([^/]+)/characters", resp.body)
+    match = _PROFILE_RE.search(resp.body)
     if not match:
         raise PoeApiError("Could not extract canonical account name from profile page.")
 
-    return urllib.parse.unquote(match.group(1))
+    return urllib.parse.unquote(match.group(1).decode("utf-8", errors="replace"))
 
 
 def get_passive_skills(account_name: str, character_name: str, realm: str, poesessid: str | None) -> dict[str, Any]:
@@ -165,7 +178,7 @@ def get_passive_skills(account_name: str, character_name: str, realm: str, poese
         raise PoeApiError(f"Failed to fetch passive skills (HTTP {resp.status}).")
 
     try:
-        return json.loads(resp.body)
+        return _loads(resp.body)
     except json.JSONDecodeError as e:
         raise PoeApiError(f"Passive skills response was not valid JSON: {e}") from e
 
@@ -180,7 +193,7 @@ def get_items(account_name: str, character_name: str, realm: str, poesessid: str
         raise PoeApiError(f"Failed to fetch items (HTTP {resp.status}).")
 
     try:
-        return json.loads(resp.body)
+        return _loads(resp.body)
     except json.JSONDecodeError as e:
         raise PoeApiError(f"Items response was not valid JSON: {e}") from e
 
@@ -215,11 +228,46 @@ def get_stash_items(
         raise PoeApiError(f"Failed to fetch stash items (HTTP {resp.status}).")
 
     try:
-        return json.loads(resp.body)
+        return _loads(resp.body)
     except json.JSONDecodeError as e:
         raise PoeApiError(f"Stash response was not valid JSON: {e}") from e
 
 
+def get_character_payloads(
+    account_name: str,
+    character_name: str,
+    realm: str,
+    poesessid: str | None,
+    include_passive: bool,
+    include_items: bool,
+) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    # Passive tree and items are independent requests; overlap them instead of waiting on each in turn.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        passive_future = (
+            pool.submit(get_passive_skills, account_name, character_name, realm, poesessid) if include_passive else None
+        )
+        items_future = pool.submit(get_items, account_name, character_name, realm, poesessid) if include_items else None
+        passive = passive_future.result() if passive_future is not None else None
+        items = items_future.result() if items_future is not None else None
+    return passive, items
+
+
+def get_characters_and_canonical(
+    account_name: str,
+    realm: str,
+    poesessid: str | None,
+) -> tuple[list[dict[str, Any]], str | PoeApiError]:
+    # The profile page lookup only needs the account name, so it runs alongside the character list.
+    # A canonicalization failure is returned rather than raised so callers can choose a fallback.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        canonical_future = pool.submit(get_canonical_account_name, account_name, poesessid)
+        characters = get_characters(account_name, realm, poesessid)
+        try:
+            return characters, canonical_future.result()
+        except PoeApiError as e:
+            return characters, e
+
+
 def choose_character(characters: list[dict[str, Any]], requested_name: str | None) -> dict[str, Any] | None:
     if not characters:
         return None
@@ -301,16 +349,19 @@ def run_onboarding() -> int:
     }
 
     try:
+        passive, items = get_character_payloads(
+            canonical_account, selected_name, REALM_MAP[realm], poesessid, include_passive, include_items
+        )
         if include_passive:
-            result["passive_skills"] = get_passive_skills(canonical_account, selected_name, REALM_MAP[realm], poesessid)
+            result["passive_skills"] = passive
         if include_items:
-            result["items"] = get_items(canonical_account, selected_name, REALM_MAP[realm], poesessid)
+            result["items"] = items
     except PoeApiError as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return 2
 
     print("\nOnboarding complete. Result:")
-    print(json.dumps(result, indent=2))
+    print(dumps_pretty(result))
     return 0
 
 
@@ -338,8 +389,9 @@ def main() -> int:
     account = normalize_account_name(args.account, realm)
 
     try:
-        characters = get_characters(account, realm, args.poesessid)
-        canonical_account = get_canonical_account_name(account, args.poesessid)
+        characters, canonical_account = get_characters_and_canonical(account, realm, args.poesessid)
+        if isinstance(canonical_account, PoeApiError):
+            raise canonical_account
 
         result: dict[str, Any] = {
             "input_account": args.account,
@@ -358,13 +410,16 @@ def main() -> int:
             selected_name = str(selected.get("name", ""))
             result["selected_character"] = selected_name
 
+            passive, items = get_character_payloads(
+                canonical_account, selected_name, realm, args.poesessid, args.include_passive, args.include_items
+            )
             if args.include_passive:
-                result["passive_skills"] = get_passive_skills(canonical_account, selected_name, realm, args.poesessid)
+                result["passive_skills"] = passive
 
             if args.include_items:
-                result["items"] = get_items(canonical_account, selected_name, realm, args.poesessid)
+                result["items"] = items
 
-        print(json.dumps(result, indent=2))
+        print(dumps_pretty(result))
         return 0
     except PoeApiError as e:
         print(f"ERROR: {e}", file=sys.stderr)
@@ -4,16 +4,25 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import operator
 import os
 import sys
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from character_ledger import update_from_market_snapshot
 from discord_persona_sender.discord_persona_sender import build_persona_message, send_discord_message
@@ -21,16 +30,19 @@ from discord_persona_sender.discord_publish_log import DEFAULT_LOG_PATH
 from poe_character_sync import (
     PoeApiError,
     choose_character,
-    get_canonical_account_name,
-    get_characters,
-    get_items,
-    get_passive_skills,
+    get_character_payloads,
+    get_characters_and_canonical,
     normalize_account_name,
 )
 
 MARKET_HOST = "https://poe.ninja"
 UNIQUE_ITEM_TYPES = ["UniqueWeapon", "UniqueArmour", "UniqueAccessory", "UniqueFlask", "UniqueJewel"]
 CURRENCY_TYPES = ["Currency", "Fragment"]
+DEFAULT_MARKET_CACHE_DIR = str(Path(__file__).resolve().parent / "logs" / "poe_ninja_cache")
+# poe.ninja refreshes its overviews every few minutes; reuse responses younger than this.
+DEFAULT_MARKET_TTL_SECONDS = 300
+
+_loads = orjson.loads if orjson is not None else json.loads
 
 
 @dataclass
@@ -41,24 +53,64 @@ class PricedHolding:
     source: str
 
 
-def http_get_json(url: str) -> dict[str, Any]:
+def http_get_bytes(url: str) -> bytes:
     req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (PoE Assistant)"})
     try:
         with urllib.request.urlopen(req, timeout=30) as resp:
             if resp.status != 200:
                 raise RuntimeError(f"HTTP {resp.status}")
-            return json.load(resp)
+            return resp.read()
     except urllib.error.HTTPError as exc:
         body = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
         raise RuntimeError(f"Market request failed (HTTP {exc.code}): {body[:200]}") from exc
 
 
-def fetch_currency_prices(league: str) -> dict[str, float]:
+def http_get_json(url: str) -> dict[str, Any]:
+    return _loads(http_get_bytes(url))
+
+
+def market_cache_path(cache_dir: str, url: str) -> Path:
+    return Path(cache_dir) / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+
+def cached_get_json(url: str, cache_dir: str | None, ttl_seconds: float) -> dict[str, Any]:
+    if not cache_dir or ttl_seconds <= 0:
+        return http_get_json(url)
+    path = market_cache_path(cache_dir, url)
+    try:
+        if time.time() - path.stat().st_mtime < ttl_seconds:
+            return _loads(path.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    raw = http_get_bytes(url)
+    payload = _loads(raw)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return payload
+
+
+def quote_league(league: str) -> str:
+    # Same encoding urlencode would apply; the overview types are plain identifiers and need none.
+    return urllib.parse.quote_plus(league)
+
+
+def currency_overview_url(league_q: str, currency_type: str) -> str:
+    return f"{MARKET_HOST}/poe1/api/economy/stash/current/currency/overview?league={league_q}&type={currency_type}"
+
+
+def item_overview_url(league_q: str, item_type: str) -> str:
+    return f"{MARKET_HOST}/poe1/api/economy/stash/current/item/overview?league={league_q}&type={item_type}"
+
+
+def reduce_currency_prices(payloads: Iterable[dict[str, Any]]) -> dict[str, float]:
     prices: dict[str, float] = {}
-    for currency_type in CURRENCY_TYPES:
-        query = urllib.parse.urlencode({"league": league, "type": currency_type})
-        url = f"{MARKET_HOST}/poe1/api/economy/stash/current/currency/overview?{query}"
-        payload = http_get_json(url)
+    for payload in payloads:
         for line in payload.get("lines", []):
             name = str(line.get("currencyTypeName", "")).strip()
             chaos = line.get("chaosEquivalent")
@@ -68,12 +120,9 @@ def fetch_currency_prices(league: str) -> dict[str, float]:
     return prices
 
 
-def fetch_unique_prices(league: str) -> dict[str, float]:
+def reduce_unique_prices(payloads: Iterable[dict[str, Any]]) -> dict[str, float]:
     prices: dict[str, float] = {}
-    for item_type in UNIQUE_ITEM_TYPES:
-        query = urllib.parse.urlencode({"league": league, "type": item_type})
-        url = f"{MARKET_HOST}/poe1/api/economy/stash/current/item/overview?{query}"
-        payload = http_get_json(url)
+    for payload in payloads:
         for line in payload.get("lines", []):
             chaos = line.get("chaosValue")
             if not isinstance(chaos, (int, float)):
@@ -88,11 +137,8 @@ def fetch_unique_prices(league: str) -> dict[str, float]:
     return prices
 
 
-def fetch_div_card_prices(league: str) -> dict[str, float]:
+def reduce_div_card_prices(payload: dict[str, Any]) -> dict[str, float]:
     prices: dict[str, float] = {}
-    query = urllib.parse.urlencode({"league": league, "type": "DivinationCard"})
-    url = f"{MARKET_HOST}/poe1/api/economy/stash/current/item/overview?{query}"
-    payload = http_get_json(url)
     for line in payload.get("lines", []):
         chaos = line.get("chaosValue")
         if not isinstance(chaos, (int, float)):
@@ -104,6 +150,40 @@ def fetch_div_card_prices(league: str) -> dict[str, float]:
     return prices
 
 
+def fetch_currency_prices(league: str) -> dict[str, float]:
+    league_q = quote_league(league)
+    return reduce_currency_prices(http_get_json(currency_overview_url(league_q, t)) for t in CURRENCY_TYPES)
+
+
+def fetch_unique_prices(league: str) -> dict[str, float]:
+    league_q = quote_league(league)
+    return reduce_unique_prices(http_get_json(item_overview_url(league_q, t)) for t in UNIQUE_ITEM_TYPES)
+
+
+def fetch_div_card_prices(league: str) -> dict[str, float]:
+    return reduce_div_card_prices(http_get_json(item_overview_url(quote_league(league), "DivinationCard")))
+
+
+def fetch_all_prices(
+    league: str,
+    cache_dir: str | None = None,
+    ttl_seconds: float = 0,
+) -> tuple[dict[str, float], dict[str, float], dict[str, float]]:
+    # The overview requests are independent, so fetch them all at once instead of one RTT after another.
+    league_q = quote_league(league)
+    urls = [currency_overview_url(league_q, t) for t in CURRENCY_TYPES]
+    urls += [item_overview_url(league_q, t) for t in UNIQUE_ITEM_TYPES]
+    urls.append(item_overview_url(league_q, "DivinationCard"))
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        payloads = list(pool.map(lambda url: cached_get_json(url, cache_dir, ttl_seconds), urls))
+    unique_end = len(CURRENCY_TYPES) + len(UNIQUE_ITEM_TYPES)
+    return (
+        reduce_currency_prices(payloads[: len(CURRENCY_TYPES)]),
+        reduce_unique_prices(payloads[len(CURRENCY_TYPES) : unique_end]),
+        reduce_div_card_prices(payloads[unique_end]),
+    )
+
+
 def get_league(selected_char: dict[str, Any], items_payload: dict[str, Any], override: str | None) -> str:
     if override:
         return override
@@ -128,6 +208,9 @@ def compact_item_label(item: dict[str, Any]) -> str:
     return name or base or "Unknown Item"
 
 
+_CHAOS_VALUE_KEY = operator.attrgetter("chaos_value")
+
+
 def estimate_holdings(
     items_payload: dict[str, Any],
     currency_prices: dict[str, float],
@@ -138,28 +221,33 @@ def estimate_holdings(
     total_items = 0
     priced_items = 0
 
+    currency_get = currency_prices.get
+    unique_get = unique_prices.get
+    div_get = div_card_prices.get
+
     for item in items_payload.get("items", []):
         total_items += 1
-        quantity = int(item.get("stackSize") or 1)
+        stack = item.get("stackSize")
+        quantity = stack if type(stack) is int and stack else int(stack or 1)
         type_line = str(item.get("typeLine", "")).strip().lower()
-        name = str(item.get("name", "")).strip().lower()
-        rarity = str(item.get("rarity", "")).strip().lower()
-        frame_type = item.get("frameType")
-
-        chaos_value: float | None = None
-        source = ""
-
-        if type_line in currency_prices:
-            chaos_value = quantity * currency_prices[type_line]
-            source = "currency"
-        elif rarity == "unique" and name and name in unique_prices:
-            chaos_value = quantity * unique_prices[name]
-            source = "item-name"
-        elif frame_type == 6 and type_line in div_card_prices:
-            chaos_value = quantity * div_card_prices[type_line]
-            source = "div-card"
-
-        if chaos_value is None or chaos_value <= 0:
+
+        # Each later lookup only runs, and only normalizes the fields it needs, when the earlier ones missed.
+        unit_price = currency_get(type_line)
+        source = "currency"
+        if unit_price is None:
+            if str(item.get("rarity", "")).strip().lower() == "unique":
+                name = str(item.get("name", "")).strip().lower()
+                if name:
+                    unit_price = unique_get(name)
+                    source = "item-name"
+            if unit_price is None and item.get("frameType") == 6:
+                unit_price = div_get(type_line)
+                source = "div-card"
+
+        if unit_price is None:
+            continue
+        chaos_value = quantity * unit_price
+        if chaos_value <= 0:
             continue
 
         priced_items += 1
@@ -172,7 +260,7 @@ def estimate_holdings(
             )
         )
 
-    priced.sort(key=lambda p: p.chaos_value, reverse=True)
+    priced.sort(key=_CHAOS_VALUE_KEY, reverse=True)
     return priced, priced_items, total_items
 
 
@@ -220,6 +308,17 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--poesessid", default=None, help="POESESSID cookie (if required)")
     parser.add_argument("--league", default=None, help="Override league for market pricing")
     parser.add_argument("--include-passive", action="store_true", help="Include passive payload in output JSON")
+    parser.add_argument(
+        "--market-cache-dir",
+        default=os.environ.get("POE_MARKET_CACHE_DIR", DEFAULT_MARKET_CACHE_DIR),
+        help=f"Directory for cached poe.ninja responses (default: {DEFAULT_MARKET_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--market-ttl",
+        type=float,
+        default=DEFAULT_MARKET_TTL_SECONDS,
+        help=f"Reuse cached poe.ninja responses younger than this many seconds; 0 disables (default: {DEFAULT_MARKET_TTL_SECONDS})",
+    )
     parser.add_argument("--webhook-url", default=os.environ.get("DISCORD_WEBHOOK_URL"), help="Discord webhook URL")
     parser.add_argument("--discord-username", default="OpenClawZeroZeroZero", help="Webhook display name")
     parser.add_argument("--log-path", default=DEFAULT_LOG_PATH, help="Append-only publish history JSONL path")
@@ -243,8 +342,8 @@ def main() -> int:
         passive_payload: dict[str, Any] | None = None
 
         if args.sheet_json:
-            with open(args.sheet_json, "r", encoding="utf-8") as f:
-                snapshot = json.load(f)
+            with open(args.sheet_json, "rb") as f:
+                snapshot = _loads(f.read())
             items_payload = snapshot.get("items", {})
             if not isinstance(items_payload, dict):
                 raise RuntimeError("sheet JSON is missing a valid 'items' object")
@@ -253,11 +352,8 @@ def main() -> int:
             if args.include_passive:
                 passive_payload = snapshot.get("passive_skills")
         else:
-            characters = get_characters(normalized_account, args.realm, args.poesessid)
-            try:
-                canonical_account = get_canonical_account_name(normalized_account, args.poesessid)
-            except PoeApiError:
-                canonical_account = normalized_account
+            characters, canonical = get_characters_and_canonical(normalized_account, args.realm, args.poesessid)
+            canonical_account = normalized_account if isinstance(canonical, PoeApiError) else canonical
 
             selected = choose_character(characters, args.character)
             if selected is None:
@@ -266,14 +362,12 @@ def main() -> int:
                 raise PoeApiError("No characters found for this account.")
 
             selected_name = str(selected.get("name", ""))
-            items_payload = get_items(canonical_account, selected_name, args.realm, args.poesessid)
-            if args.include_passive:
-                passive_payload = get_passive_skills(canonical_account, selected_name, args.realm, args.poesessid)
+            passive_payload, items_payload = get_character_payloads(
+                canonical_account, selected_name, args.realm, args.poesessid, args.include_passive, True
+            )
 
         league = get_league(selected, items_payload, args.league)
-        currency_prices = fetch_currency_prices(league)
-        unique_prices = fetch_unique_prices(league)
-        div_card_prices = fetch_div_card_prices(league)
+        currency_prices, unique_prices, div_card_prices = fetch_all_prices(league, args.market_cache_dir, args.market_ttl)
         priced_holdings, priced_count, total_count = estimate_holdings(
             items_payload,
             currency_prices,
@@ -316,8 +410,12 @@ def main() -> int:
             output["passive_skills"] = passive_payload
 
         if args.output:
-            with open(args.output, "w", encoding="utf-8") as f:
-                json.dump(output, f, indent=2)
+            if orjson is not None:
+                with open(args.output, "wb") as f:
+                    f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+            else:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    json.dump(output, f, indent=2)
             update_from_market_snapshot(output, Path(args.output))
         else:
             update_from_market_snapshot(output)
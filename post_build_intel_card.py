@@ -7,14 +7,13 @@ import argparse
 import json
 import os
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
 from datetime import datetime, timezone
 from typing import Any
 
+import http_keepalive
 from discord_publish_log import DEFAULT_LOG_PATH, append_publish_history
-from poe_market_pipeline import estimate_holdings, fetch_currency_prices, fetch_div_card_prices, fetch_unique_prices
+from poe_market_pipeline import DEFAULT_MARKET_CACHE_DIR, estimate_holdings, fetch_all_prices
 
 
 def read_snapshot(path: str) -> dict[str, Any]:
@@ -83,43 +82,48 @@ def post_discord_embed(
         "embeds": embeds,
         "allowed_mentions": {"parse": []},
     }
-    req = urllib.request.Request(
+    # Webhook posts share keep-alive connections, so posting several cards in one run only pays
+    # the TCP/TLS handshake once.
+    resp = http_keepalive.request(
+        "POST",
         with_wait_query(webhook_url),
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json", "User-Agent": "PoE-Assistant/1.0"},
-        method="POST",
+        json.dumps(payload).encode("utf-8"),
+        {
+            "Content-Type": "application/json",
+            "User-Agent": "PoE-Assistant/1.0",
+            "Connection": "keep-alive",
+        },
     )
-    try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            if resp.status < 200 or resp.status >= 300:
-                raise RuntimeError(f"Webhook post failed with HTTP {resp.status}")
-            raw = resp.read().decode("utf-8", errors="replace")
-            discord_message = json.loads(raw) if raw else None
-            append_publish_history(
-                source="post_build_intel_card",
-                webhook_url=webhook_url,
-                username=username,
-                content=content,
-                embeds=embeds,
-                discord_message=discord_message if isinstance(discord_message, dict) else None,
-                metadata={"card_type": "build_intelligence"},
-                log_path=log_path,
-            )
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
-        raise RuntimeError(f"Webhook post failed with HTTP {exc.code}: {body}") from exc
-
-
-def make_card(snapshot: dict[str, Any], league_override: str | None = None) -> dict[str, Any]:
+    if resp.status < 200 or resp.status >= 300:
+        body = resp.body.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Webhook post failed with HTTP {resp.status}: {body}")
+    raw = resp.body.decode("utf-8", errors="replace")
+    discord_message = json.loads(raw) if raw else None
+    append_publish_history(
+        source="post_build_intel_card",
+        webhook_url=webhook_url,
+        username=username,
+        content=content,
+        embeds=embeds,
+        discord_message=discord_message if isinstance(discord_message, dict) else None,
+        metadata={"card_type": "build_intelligence"},
+        log_path=log_path,
+    )
+
+
+def make_card(
+    snapshot: dict[str, Any],
+    league_override: str | None = None,
+    market_cache_dir: str | None = None,
+    market_ttl: float = 0,
+) -> dict[str, Any]:
     char = snapshot.get("items", {}).get("character", {})
     items_payload = snapshot.get("items", {})
     league = league_override or char.get("league") or snapshot.get("league") or "Standard"
 
     build = extract_build_signals(items_payload)
 
-    currency_prices = fetch_currency_prices(league)
-    unique_prices = fetch_unique_prices(league)
-    div_prices = fetch_div_card_prices(league)
+    currency_prices, unique_prices, div_prices = fetch_all_prices(league, market_cache_dir, market_ttl)
     priced_holdings, priced_count, total_count = estimate_holdings(items_payload, currency_prices, unique_prices, div_prices)
 
     top_holdings = priced_holdings[:3]
@@ -217,6 +221,17 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--webhook-url", default=os.environ.get("DISCORD_WEBHOOK_URL"), help="Discord webhook URL")
     parser.add_argument("--username", default="OpenClawZeroZeroZero", help="Webhook username")
     parser.add_argument("--league", default=None, help="Override league for pricing")
+    parser.add_argument(
+        "--market-cache-dir",
+        default=os.environ.get("POE_MARKET_CACHE_DIR", DEFAULT_MARKET_CACHE_DIR),
+        help=f"Directory for cached poe.ninja responses (default: {DEFAULT_MARKET_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--market-ttl",
+        type=float,
+        default=0,
+        help="Reuse cached poe.ninja responses younger than this many seconds (default: 0, always fetch fresh)",
+    )
     parser.add_argument("--log-path", default=DEFAULT_LOG_PATH, help="Append-only publish history JSONL path")
     parser.add_argument("--dry-run", action="store_true", help="Print payload without posting")
     return parser.parse_args()
@@ -229,7 +244,12 @@ def main() -> int:
         return 2
 
     snapshot = read_snapshot(args.snapshot)
-    card = make_card(snapshot, league_override=args.league)
+    card = make_card(
+        snapshot,
+        league_override=args.league,
+        market_cache_dir=args.market_cache_dir,
+        market_ttl=args.market_ttl,
+    )
 
     if args.dry_run:
         print(json.dumps(card, indent=2))